@@ -0,0 +1,219 @@
+"""
+Benchmarks of hot paths of frontend. Run from repository root::
+
+    python3 -m benchmarks.bench_hot_paths
+    python3 -m benchmarks.bench_hot_paths --sizes 100 1000 --save baseline.json
+    python3 -m benchmarks.bench_hot_paths --compare baseline.json
+
+GTK benchmarks (row creation, list build, image loading) are run only if GTK can be imported and display is
+available (use Xvfb on headless machines), others need only standard library.
+"""
+
+import argparse
+import json
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+from fake_database import FakeDatabase
+from sortimentGUI import data_manipulation
+from sortimentGUI.search_index import SearchIndex
+
+default_sizes = (100, 1000, 10000, 50000)
+filter_groups = ["abc", "def", "ghi", "jkl", "mno", "pqrs", "tuv", "wxyz"]
+
+
+def measure(function, repeat=3):
+    """
+    :param function: function without arguments
+    :param repeat: number of runs
+    :return: best duration in seconds
+    """
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_normalize(users):
+    names = [name for user in users for name in data_manipulation.get_all_names(user)]
+    return measure(lambda: [data_manipulation.normalize_string(name) for name in names])
+
+
+def bench_filter(users):
+    regexes = [re.compile("[" + filter_groups[i] + "][" + filter_groups[(i + 3) % len(filter_groups)] + "]")
+               for i in range(len(filter_groups))]
+    return measure(lambda: [data_manipulation.matches_filter(user, regex) for regex in regexes for user in users])
+
+
+def bench_indexed_filter(users):
+    regexes = [re.compile("[" + filter_groups[i] + "][" + filter_groups[(i + 3) % len(filter_groups)] + "]")
+               for i in range(len(filter_groups))]
+
+    def run():
+        index = SearchIndex()
+        index.add(users)
+        for regex in regexes:
+            for user in users:
+                index.matches(user, regex)
+
+    return measure(run)
+
+
+def bench_fuzzy_search(users):
+    index = SearchIndex()
+    index.add(users)
+    queries = ["stefan", "stefn kral", "zofia novak", "ondre", "mar"]
+    return measure(lambda: [index.fuzzy_search(query) for query in queries]) / len(queries)
+
+
+def bench_format_money(users):
+    return measure(lambda: [data_manipulation.format_money(user.balance) for user in users])
+
+
+def bench_parse_money(users):
+    texts = [data_manipulation.format_money(user.balance, currency="") for user in users]
+    return measure(lambda: [data_manipulation.parse_money(text) for text in texts])
+
+
+def bench_report(users, items):
+    from sortimentGUI import reporting
+
+    generator = random.Random(0)
+    count = min(len(users) * 20, 1000000)
+    now = time.time()
+    transactions = [(generator.choice(users).id, generator.choice(items).id, generator.randint(1, 3),
+                     generator.randint(10, 500), now - generator.uniform(0, 365 * 86400)) for _ in range(count)]
+
+    def run():
+        history = reporting.TransactionHistory(transactions)
+        reporting.create_report(history, users, items, format_money=data_manipulation.format_money)
+
+    return measure(run)
+
+
+def bench_display_strings(users, items):
+    def run():
+        for user in users:
+            data_manipulation.get_universal_printable_name(user)
+            data_manipulation.get_user_balance_printable(user)
+        for item in items:
+            data_manipulation.get_item_printable_name(item, pricetag=True)
+
+    return measure(run)
+
+
+def gtk_available():
+    try:
+        import gi
+        gi.require_version("Gtk", "3.0")
+        from gi.repository import Gtk
+    except (ImportError, ValueError):
+        return False
+    return Gtk.init_check(sys.argv)[0]
+
+
+def bench_gtk(users, photo):
+    from gi.repository import Gtk
+    from sortimentGUI import gtk_element_editor
+    from sortimentGUI import thumbnail_atlas
+
+    results = dict()
+    results["create_user_row"] = measure(lambda: [gtk_element_editor.create_user_row(user) for user in users], 1)
+
+    def build_list():
+        listbox = Gtk.ListBox()
+        for user in users:
+            listbox.add(gtk_element_editor.create_user_row(user))
+        listbox.show_all()
+
+    results["list_build"] = measure(build_list, 1)
+    atlas_dir = tempfile.mkdtemp()
+    atlas = thumbnail_atlas.update_atlas("user", users, 50, atlas_dir)
+    results["create_user_row_atlas"] = measure(
+        lambda: [gtk_element_editor.create_user_row(user, atlas=atlas) for user in users], 1)
+    shutil.rmtree(atlas_dir)
+    image = Gtk.Image()
+    results["load_image_from_file"] = measure(
+        lambda: [gtk_element_editor.load_image_from_file(image, photo, 50, 50) for _ in range(min(len(users), 1000))],
+        1)
+    return results
+
+
+def run(sizes, gtk=True):
+    """
+    Runs all benchmarks.
+
+    :param sizes: numbers of users to generate
+    :param gtk: True if GTK benchmarks should be run (if GTK is available)
+    :return: dictionary mapping "benchmark/size" to duration in seconds
+    """
+
+    results = dict()
+    photo_dir = None
+    if gtk and gtk_available():
+        photo_dir = tempfile.mkdtemp()
+    else:
+        gtk = False
+    for size in sizes:
+        database = FakeDatabase(size, max(size // 10, 1), latency="none", photo_dir=photo_dir, photo_count=1)
+        users = database.get_user()
+        items = database.get_item()
+        results["normalize_string/" + str(size)] = bench_normalize(users)
+        results["user_filter/" + str(size)] = bench_filter(users)
+        results["indexed_filter/" + str(size)] = bench_indexed_filter(users)
+        results["fuzzy_search/" + str(size)] = bench_fuzzy_search(users)
+        results["format_money/" + str(size)] = bench_format_money(users)
+        results["parse_money/" + str(size)] = bench_parse_money(users)
+        results["display_strings/" + str(size)] = bench_display_strings(users, items)
+        results["report/" + str(size)] = bench_report(users, items)
+        if gtk:
+            for name, duration in bench_gtk(users, users[0].photo).items():
+                results[name + "/" + str(size)] = duration
+    if photo_dir is not None:
+        shutil.rmtree(photo_dir)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    :return: list of benchmarks slower than baseline * tolerance
+    """
+
+    return [name for name, duration in results.items()
+            if name in baseline and duration > baseline[name] * tolerance]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of frontend hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=default_sizes, help="numbers of users")
+    parser.add_argument("--no-gtk", action="store_true", help="skip benchmarks requiring GTK")
+    parser.add_argument("--save", help="save results to JSON file")
+    parser.add_argument("--compare", help="compare results with JSON file and fail on regression")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor for --compare")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, gtk=not args.no_gtk)
+    for name, duration in results.items():
+        print("{:<32}{:>12.3f} ms".format(name, duration * 1000))
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name in regressions:
+            print("Regression:", name)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
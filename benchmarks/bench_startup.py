@@ -0,0 +1,125 @@
+"""
+Benchmark of frontend startup. Every run starts fresh interpreter, so import time and typelib loading are included.
+Run from repository root::
+
+    python3 -m benchmarks.bench_startup
+    python3 -m benchmarks.bench_startup --users 5000 --save startup.json
+    python3 -m benchmarks.bench_startup --compare startup.json
+
+Measured phases are import of `sortimentGUI.__main__` and (if display is available) creation of main window until
+its first frame is drawn. Modules which should be imported only on first use are reported if they were imported.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_hot_paths import compare
+
+# modules which shouldn't be imported before main window is shown
+lazy_modules = ("sortimentGUI.capture", "database_client", "fake_database")
+
+child_code = """
+import json, os, sys, time
+start = time.perf_counter()
+import sortimentGUI.__main__ as main_module
+result = {"import": time.perf_counter() - start}
+result["eager_modules"] = [m for m in LAZY_MODULES if m in sys.modules]
+if GTK:
+    from gi.repository import Gtk
+    if Gtk.init_check(sys.argv)[0]:
+        import fake_database
+        from sortimentGUI.config import load_config
+        from sortimentGUI.window_handler import WindowHandler
+
+        def first_draw(*_):
+            result["main_window"] = time.perf_counter() - start_window
+            Gtk.main_quit()
+            return False
+
+        start_window = time.perf_counter()
+        handler = WindowHandler()
+        handler.set_config(load_config())
+        window = main_module.window_creator.create_window_main(handler, fake_database.FakeDatabase(USERS,
+                                                               max(USERS // 10, 20), latency="none"))
+        window.connect("draw", first_draw)
+        Gtk.main()
+print(json.dumps(result))
+sys.stdout.flush()
+os._exit(0)
+"""
+
+
+def run_once(users, gtk, snapshot_dir):
+    """
+    Starts frontend in new interpreter.
+
+    :param users: number of users of synthetic database
+    :param gtk: True if main window should be created
+    :param snapshot_dir: directory for snapshots, so user's cache is not touched
+    :return: dictionary with durations in seconds and list of eagerly imported modules
+    """
+
+    code = child_code.replace("LAZY_MODULES", repr(lazy_modules)).replace("GTK", repr(gtk)).replace(
+        "USERS", str(users))
+    env = dict(os.environ, SORTIMENT_SNAPSHOT_DIR=snapshot_dir, SORTIMENT_WATCHDOG_THRESHOLD="0")
+    output = subprocess.run([sys.executable, "-c", code], env=env, stdout=subprocess.PIPE, check=True).stdout
+    return json.loads(output.decode().strip().split("\n")[-1])
+
+
+def run(users, repeat=5, gtk=True):
+    """
+    :param users: number of users of synthetic database
+    :param repeat: number of runs, best duration is reported
+    :param gtk: True if main window should be created
+    :return: (dictionary mapping phase to duration in seconds, list of eagerly imported modules)
+    """
+
+    results = dict()
+    eager_modules = set()
+    snapshot_dir = tempfile.mkdtemp()
+    try:
+        for _ in range(repeat):
+            result = run_once(users, gtk, snapshot_dir)
+            eager_modules.update(result.pop("eager_modules"))
+            for name, duration in result.items():
+                results[name] = min(results.get(name, float("inf")), duration)
+    finally:
+        shutil.rmtree(snapshot_dir)
+    return results, sorted(eager_modules)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark of frontend startup.")
+    parser.add_argument("--users", type=int, default=1000, help="number of users of synthetic database")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs")
+    parser.add_argument("--no-gtk", action="store_true", help="measure only imports")
+    parser.add_argument("--save", help="save results to JSON file")
+    parser.add_argument("--compare", help="compare results with JSON file and fail on regression")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor for --compare")
+    args = parser.parse_args(argv)
+
+    results, eager_modules = run(args.users, args.repeat, gtk=not args.no_gtk)
+    for name, duration in results.items():
+        print("{:<32}{:>12.3f} ms".format(name, duration * 1000))
+    for name in eager_modules:
+        print("Imported eagerly:", name)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name in regressions:
+            print("Regression:", name)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Local cache daemon shared by several frontend instances on one machine. It holds users, items and thumbnails once
+and serves them over Unix socket using protocol described in `database_protocol`, so backend load and memory don't
+grow with number of kiosks::
+
+    python3 cache_daemon.py --socket /tmp/sortiment.sock --upstream backend:8765
+    SORTIMENT_CACHE_SOCKET=/tmp/sortiment.sock python3 sortimentRUN.py
+"""
+
+import argparse
+import asyncio
+import collections
+import copy
+import hashlib
+import os
+import threading
+import time
+
+import database_factory
+from database_server import DatabaseServer
+from sortimentGUI.single_flight import SingleFlight
+
+default_socket_path = os.path.join(os.environ.get("XDG_RUNTIME_DIR", "/tmp"), "sortiment.sock")
+default_thumbnail_dir = os.path.join(os.path.expanduser("~"), ".cache", "sortiment", "thumbnails")
+
+
+class CachingDatabase:
+    """
+    Wraps upstream database and caches users and items. If upstream notifies about changes, cache is updated by them,
+    otherwise cached lists expire after `ttl` seconds. Writes are passed to upstream.
+
+    Concurrent misses of the same list share one upstream fetch. Changes notified during fetch are applied to its
+    result, and result of fetch started before reset or write (without notifications) isn't cached.
+    """
+
+    def __init__(self, upstream, ttl=30, thumbnail_dir=default_thumbnail_dir):
+        """
+        :param upstream: database object (for example `database_client.DatabaseClient`)
+        :param ttl: lifetime of cached lists in seconds when upstream doesn't support notifications
+        :param thumbnail_dir: directory for shared thumbnails
+        """
+
+        self.upstream = upstream
+        self.ttl = ttl
+        self.thumbnail_dir = thumbnail_dir
+        self.lock = threading.Lock()
+        self.cache = dict()  # "user" or "item" -> (time of fetch, dict(id -> object))
+        self.versions = collections.Counter()  # "user" or "item" -> number of invalidations of cached list
+        self.fetch_changes = collections.defaultdict(list)  # "user" or "item" -> list of dict(id -> object) of
+        # changes notified during running fetches (one dictionary per fetch)
+        self.flight = SingleFlight()
+        self.listeners = list()
+        self.live = hasattr(upstream, "subscribe")
+        if self.live:
+            upstream.subscribe(self.on_upstream_change)
+
+    def on_upstream_change(self, kind, obj):
+        with self.lock:
+            if kind == "reset":
+                self.cache.clear()
+                for cached_kind in ("user", "item"):
+                    self.versions[cached_kind] += 1
+            else:
+                if kind in self.cache:
+                    self.cache[kind][1][obj.id] = obj
+                for changes in self.fetch_changes.get(kind, ()):
+                    changes[obj.id] = obj
+        for listener in list(self.listeners):
+            listener(kind, obj)
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def get_cached(self, kind, fetch):
+        with self.lock:
+            entry = self.cache.get(kind)
+            if entry is not None and (self.live or time.monotonic() - entry[0] < self.ttl):
+                return copy.deepcopy(list(entry[1].values()))
+            version = self.versions[kind]
+        objects = self.flight.do((kind, version), lambda: self.fetch_to_cache(kind, version, fetch))
+        return copy.deepcopy(objects)
+
+    def fetch_to_cache(self, kind, version, fetch):
+        """
+        Fetches list from upstream and caches it, if it wasn't invalidated meanwhile.
+
+        :param kind: "user" or "item"
+        :param version: version of list when fetch was started
+        :param fetch: function fetching list from upstream
+        :return: list of objects (shared with cache)
+        """
+
+        changes = dict()
+        with self.lock:
+            self.fetch_changes[kind].append(changes)
+        try:
+            objects = fetch()
+        except Exception:
+            with self.lock:
+                self.fetch_changes[kind].remove(changes)
+            raise
+        with self.lock:
+            # changes are applied in the same critical section which stops buffering, so no notification is lost
+            self.fetch_changes[kind].remove(changes)
+            by_id = {obj.id: obj for obj in objects}
+            by_id.update(changes)
+            if self.versions[kind] == version:
+                self.cache[kind] = (time.monotonic(), by_id)
+        return list(by_id.values())
+
+    def invalidate(self, kind):
+        if not self.live:
+            with self.lock:
+                self.cache.pop(kind, None)
+                self.versions[kind] += 1
+
+    def get_user(self, _=None):
+        return self.get_cached("user", self.upstream.get_user)
+
+    def get_item(self, _=None):
+        return self.get_cached("item", lambda: self.upstream.get_item(None))
+
+    def get_transactions(self, since=None, limit=None, offset=0):
+        return self.upstream.get_transactions(since, limit, offset)
+
+    def buy_items(self, user_id, item_id, amount, price=None):
+        try:
+            return self.upstream.buy_items(user_id, item_id, amount, price)
+        finally:
+            self.invalidate("user")
+
+    def transfer_money(self, transfers):
+        try:
+            return self.upstream.transfer_money(transfers)
+        finally:
+            self.invalidate("user")
+
+    def add_user(self, user):
+        try:
+            return self.upstream.add_user(user)
+        finally:
+            self.invalidate("user")
+
+    def edit_user(self, user):
+        try:
+            return self.upstream.edit_user(user)
+        finally:
+            self.invalidate("user")
+
+    def add_item(self, item):
+        try:
+            return self.upstream.add_item(item)
+        finally:
+            self.invalidate("item")
+
+    def edit_item(self, item):
+        try:
+            return self.upstream.edit_item(item)
+        finally:
+            self.invalidate("item")
+
+    def import_objects(self, users, items):
+        try:
+            return self.upstream.import_objects(users, items)
+        finally:
+            self.invalidate("user")
+            self.invalidate("item")
+
+    def get_thumbnail(self, path, size):
+        """
+        Gets path of thumbnail of image shared by all frontends. Thumbnail is created only once per image version.
+
+        :param path: path to image
+        :param size: size of thumbnail in pixels
+        :return: path to thumbnail, or original path if thumbnail can't be created
+        """
+
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            return path
+        key = hashlib.sha1((path + ":" + str(stat.st_mtime_ns) + ":" + str(size)).encode()).hexdigest()
+        thumbnail = os.path.join(self.thumbnail_dir, key + ".png")
+        if os.path.exists(thumbnail):
+            return thumbnail
+        try:
+            from gi.repository import GdkPixbuf
+            os.makedirs(self.thumbnail_dir, exist_ok=True)
+            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(path, size, size, True)
+            tmp = thumbnail + "." + str(os.getpid()) + ".tmp"
+            pixbuf.savev(tmp, "png", [], [])
+            os.replace(tmp, thumbnail)
+        except Exception:
+            return path
+        return thumbnail
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local cache daemon shared by frontends.")
+    parser.add_argument("--socket", default=default_socket_path, help="path of Unix socket to listen on")
+    parser.add_argument("--upstream", help="host:port of database server")
+    parser.add_argument("--fake", type=int, help="use synthetic database with given number of users instead")
+    parser.add_argument("--ttl", type=float, default=30, help="lifetime of cached lists without notifications")
+    args = parser.parse_args(argv)
+
+    upstream = database_factory.create_database(address=args.upstream, fake=args.fake)
+    asyncio.run(DatabaseServer(CachingDatabase(upstream, args.ttl), path=args.socket).serve_forever())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,75 @@
 from time import sleep
 
 
+class User:
+    def __init__(self, id=None, nick=None, name=None, photo=None, balance=None):
+        self.id = id
+        self.nick = nick
+        self.name = name
+        self.photo = photo
+        self.balance = balance
+
+
+class Item:
+    def __init__(self, id=None, name=None, price=None, photo=None, barcode=None):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.photo = photo
+        self.barcode = barcode
+
+
 class Database:
     @staticmethod
     def get_user(_=None):
         sleep(5)
-        return [{'photo': '/tmp/photo.bmp', 'nick': 'Peto', 'balance': 47}, {'nick': 'Kubo'}]
+        return [User(1, photo='/tmp/photo.bmp', nick='Peto', balance=47), User(2, nick='Kubo')]
 
     @staticmethod
     def get_item(_=None):
         sleep(3)
-        return [{'name': 'Horalky', 'price': 25}, {'name': 'Pizza', 'price': 135}]
+        return [Item(1, name='Horalky', price=25), Item(2, name='Pizza', price=135)]
 
     @staticmethod
     def buy_items(user_id, item_id, amount, price=None):
         print("user: ", user_id, "\nitem: ", item_id, "\n amount: ", amount, "\nprice: ", price)
+
+    @staticmethod
+    def get_transactions(since=None, limit=None, offset=0):
+        """
+        Gets transaction history. Transaction changes balance of user by -amount * price, money transfers are
+        transactions without item. History is only appended to, so it can be read in chunks by increasing offset.
+
+        :param since: time (seconds since epoch) of oldest returned transaction (or None for all)
+        :param limit: maximal number of returned transactions (or None for all)
+        :param offset: number of transactions matching `since` which are skipped
+        :return: list of (user id, item id or None, amount, price, time), oldest first
+        """
+
+        return []
+
+    @staticmethod
+    def transfer_money(transfers):
+        """
+        Applies all transfers in one transaction. Transfers whose id was already applied are ignored.
+
+        :param transfers: list of (transfer id, id of paying user, id of receiving user, amount in cents),
+            None instead of user id means cash
+        """
+
+        for transfer_id, from_user_id, to_user_id, amount in transfers:
+            print("transfer: ", transfer_id, "\nfrom: ", from_user_id, "\nto: ", to_user_id, "\namount: ", amount)
+
+    @staticmethod
+    def import_objects(users, items):
+        """
+        Adds all users and items in one transaction, either all of them are added or none. Subscribers are notified
+        once by ("reset", None) instead of once per object.
+
+        :param users: list of new users (ids are assigned by database)
+        :param items: list of new items (ids are assigned by database)
+        :return: (list of ids of users, list of ids of items)
+        """
+
+        print("import: ", len(users), " users, ", len(items), " items")
+        return list(), list()
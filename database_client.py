@@ -0,0 +1,304 @@
+"""
+Networked implementation of `database.Database` interface. Requests are sent over pool of persistent connections
+using protocol described in `database_protocol`. Several requests may be pipelined on one connection.
+
+Client runs its own asyncio event loop in background thread, so blocking methods (`get_user`, ...) can be called
+from any thread except that loop, and `call_async` can be used from GLib main loop without blocking it.
+"""
+
+import asyncio
+import itertools
+import socket
+import threading
+
+import database_protocol
+
+
+class DatabaseClientError(Exception):
+    pass
+
+
+class Connection:
+    """
+    One persistent connection. Responses are matched to requests by id, so requests can be pipelined.
+    """
+
+    def __init__(self, reader, writer, event_callback=None):
+        self.reader = reader
+        self.writer = writer
+        self.event_callback = event_callback  # called with (kind, object) for change notifications
+        self.pending = dict()  # request id -> future
+        self.ids = itertools.count(1)
+        self.closed = False
+        self.reader_task = asyncio.ensure_future(self.read_responses())
+
+    @classmethod
+    async def open(cls, address, timeout, event_callback=None):
+        """
+        :param address: (host, port) tuple for TCP, or path of Unix socket
+        :param timeout: connect timeout in seconds
+        :param event_callback: function called with (kind, object) for change notifications
+        """
+
+        if isinstance(address, str):
+            reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(address), timeout)
+        else:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(*address), timeout)
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family != socket.AF_UNIX:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(reader, writer, event_callback)
+
+    async def read_responses(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                message = database_protocol.decode_message(line)
+                if "event" in message:
+                    if self.event_callback is not None:
+                        self.event_callback(message["event"], message.get("data"))
+                    continue
+                future = self.pending.pop(message.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(DatabaseClientError(message["error"]))
+                else:
+                    future.set_result(message.get("result"))
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.close(DatabaseClientError("Connection closed."))
+
+    async def request(self, method, args, timeout):
+        if self.closed:
+            raise DatabaseClientError("Connection closed.")
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            self.writer.write(database_protocol.encode_message({"id": request_id, "method": method, "args": args}))
+            await self.writer.drain()
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise DatabaseClientError("Request " + method + " timed out.")
+        except ConnectionError as e:
+            self.close(e)
+            raise DatabaseClientError("Connection failed: " + str(e))
+        finally:
+            self.pending.pop(request_id, None)
+
+    def close(self, exception=None):
+        if self.closed:
+            return
+        self.closed = True
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(exception or DatabaseClientError("Connection closed."))
+        self.pending.clear()
+        self.writer.close()
+
+
+class ConnectionPool:
+    """
+    Pool of persistent connections. Request is sent over least loaded connection, new connection is opened only
+    when all connections have at least `max_pipeline` requests in flight.
+    """
+
+    def __init__(self, address, size=4, max_pipeline=8, connect_timeout=5):
+        self.address = address
+        self.size = size
+        self.max_pipeline = max_pipeline
+        self.connect_timeout = connect_timeout
+        self.connections = list()
+        self.connecting = None
+
+    async def acquire(self):
+        self.connections = [c for c in self.connections if not c.closed]
+        best = min(self.connections, key=lambda c: len(c.pending), default=None)
+        if best is not None and (len(best.pending) < self.max_pipeline or len(self.connections) >= self.size):
+            return best
+        if self.connecting is None:
+            self.connecting = asyncio.ensure_future(Connection.open(self.address, self.connect_timeout))
+        connecting = self.connecting
+        try:
+            connection = await connecting
+        except (OSError, asyncio.TimeoutError) as e:
+            if best is not None:
+                return best
+            raise DatabaseClientError("Can't connect to " + str(self.address) + ": " + str(e))
+        finally:
+            if self.connecting is connecting:
+                self.connecting = None
+        if connection not in self.connections:
+            self.connections.append(connection)
+        return connection
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
+        self.connections = list()
+
+
+class DatabaseClient:
+    """
+    Database implemented by remote server.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, pool_size=4, max_pipeline=8, timeout=10, keep_alive=30,
+                 reconnect_delay=2, path=None):
+        """
+        :param host: address of server
+        :param port: port of server
+        :param pool_size: maximal number of connections
+        :param max_pipeline: number of requests in flight on one connection before new connection is opened
+        :param timeout: timeout of one request in seconds
+        :param keep_alive: interval of pinging idle connections in seconds (or None)
+        :param reconnect_delay: delay before reconnecting lost subscription in seconds
+        :param path: path of Unix socket (for example of local cache daemon), host and port are ignored if set
+        """
+
+        self.address = path if path is not None else (host, port)
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.reconnect_delay = reconnect_delay
+        self.subscribers = list()
+        self.background = list()  # futures of background tasks (event loop keeps only weak references to tasks)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="database-client", daemon=True)
+        self.thread.start()
+        self.pool = ConnectionPool(self.address, pool_size, max_pipeline, connect_timeout=timeout)
+        if keep_alive is not None:
+            self.background.append(asyncio.run_coroutine_threadsafe(self.keep_alive_loop(), self.loop))
+
+    async def keep_alive_loop(self):
+        while True:
+            await asyncio.sleep(self.keep_alive)
+            for connection in list(self.pool.connections):
+                if not connection.closed and not connection.pending:
+                    try:
+                        await connection.request("ping", [], self.timeout)
+                    except DatabaseClientError:
+                        connection.close()
+
+    async def request(self, method, *args):
+        connection = await self.pool.acquire()
+        return await connection.request(method, list(args), self.timeout)
+
+    def call_future(self, method, *args):
+        """
+        Starts request without waiting for result.
+
+        :return: concurrent.futures.Future
+        """
+
+        return asyncio.run_coroutine_threadsafe(self.request(method, *args), self.loop)
+
+    def call(self, method, *args):
+        """
+        Sends request and waits for result. Must not be called from thread of client event loop.
+        """
+
+        return self.call_future(method, *args).result()
+
+    def call_async(self, method, *args, callback=None, error_callback=None):
+        """
+        Sends request and calls callback with result in GLib main loop, so GTK main thread is never blocked.
+
+        :param method: name of database method
+        :param args: arguments of method
+        :param callback: function called with result
+        :param error_callback: function called with exception
+        """
+
+        from gi.repository import GLib
+
+        def run_once(function, value):
+            function(value)
+            return False
+
+        def done(future):
+            exception = future.exception()
+            if exception is not None:
+                if error_callback is not None:
+                    GLib.idle_add(run_once, error_callback, exception)
+            elif callback is not None:
+                GLib.idle_add(run_once, callback, future.result())
+
+        self.call_future(method, *args).add_done_callback(done)
+
+    def dispatch_event(self, kind, obj):
+        for callback in list(self.subscribers):
+            callback(kind, obj)
+
+    async def subscription_loop(self):
+        """
+        Keeps dedicated connection receiving change notifications. After connection is reestablished, subscribers
+        are called with ("reset", None), because notifications may have been missed. First connection doesn't
+        cause reset, subscribers fetch initial data themselves.
+        """
+
+        connected_before = False
+        while True:
+            try:
+                connection = await Connection.open(self.address, self.timeout, self.dispatch_event)
+                await connection.request("subscribe", [], self.timeout)
+                if connected_before:
+                    self.dispatch_event("reset", None)
+                connected_before = True
+                await connection.reader_task
+            except (OSError, asyncio.TimeoutError, DatabaseClientError):
+                pass
+            await asyncio.sleep(self.reconnect_delay)
+
+    def subscribe(self, callback):
+        """
+        Registers callback called with (kind, object) when user ("user") or item ("item") changes on server.
+        Callback is called from thread of client event loop.
+
+        :param callback: function
+        """
+
+        self.subscribers.append(callback)
+        if len(self.subscribers) == 1:
+            self.background.append(asyncio.run_coroutine_threadsafe(self.subscription_loop(), self.loop))
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.pool.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def get_user(self, _=None):
+        return self.call("get_user")
+
+    def get_item(self, _=None):
+        return self.call("get_item")
+
+    def get_transactions(self, since=None, limit=None, offset=0):
+        return self.call("get_transactions", since, limit, offset)
+
+    def buy_items(self, user_id, item_id, amount, price=None):
+        return self.call("buy_items", user_id, item_id, amount, price)
+
+    def transfer_money(self, transfers):
+        return self.call("transfer_money", transfers)
+
+    def add_user(self, user):
+        return self.call("add_user", user)
+
+    def edit_user(self, user):
+        return self.call("edit_user", user)
+
+    def add_item(self, item):
+        return self.call("add_item", item)
+
+    def edit_item(self, item):
+        return self.call("edit_item", item)
+
+    def import_objects(self, users, items):
+        return self.call("import_objects", users, items)
+
+    def get_thumbnail(self, path, size):
+        return self.call("get_thumbnail", path, size)
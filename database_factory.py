@@ -0,0 +1,42 @@
+"""
+Creates database object used by frontend and command line tools: networked client connected to local cache daemon
+or to database server, synthetic database (for profiling and testing) or default `database.Database`.
+"""
+
+
+def parse_address(address):
+    """
+    :param address: "host:port" or ":port" (localhost)
+    :return: (host, port)
+    """
+
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def create_database(socket=None, address=None, fake=None, pool_size=4, timeout=10, **fake_options):
+    """
+    Creates database. First given option is used: Unix socket of local cache daemon, address of database server,
+    number of users of synthetic database. Without options, `database.Database` is created.
+
+    :param socket: path of Unix socket of local cache daemon (or None)
+    :param address: host:port of database server (or None)
+    :param fake: number of users of synthetic database (or None)
+    :param pool_size: maximal number of connections of networked client
+    :param timeout: timeout of requests of networked client in seconds
+    :param fake_options: other keyword arguments of `fake_database.FakeDatabase`
+    :return: database object
+    """
+
+    if socket:
+        from database_client import DatabaseClient
+        return DatabaseClient(path=socket, pool_size=pool_size, timeout=timeout)
+    if address:
+        from database_client import DatabaseClient
+        host, port = parse_address(address)
+        return DatabaseClient(host, port, pool_size=pool_size, timeout=timeout)
+    if fake:
+        from fake_database import FakeDatabase
+        return FakeDatabase(users=fake, items=max(fake // 10, 20), **fake_options)
+    from database import Database
+    return Database()
@@ -0,0 +1,58 @@
+"""
+Protocol used between `database_client.DatabaseClient` and `database_server`. Every message is one line of JSON.
+
+Request: ``{"id": 1, "method": "get_user", "args": []}``
+
+Response: ``{"id": 1, "result": ...}`` or ``{"id": 1, "error": "message"}``
+
+Responses to pipelined requests may arrive in any order, they are matched by id.
+
+After ``subscribe`` request, server also sends change notifications without id:
+``{"event": "user", "data": {...}}`` (event is "user" or "item", or "reset" with null data after bulk import).
+"""
+
+import json
+
+from database import User, Item
+
+model_types = {"User": User, "Item": Item}
+
+
+def encode_value(value):
+    if isinstance(value, (User, Item)):
+        res = {"__type__": type(value).__name__}
+        res.update(vars(value))
+        return res
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v) for v in value]
+    return value
+
+
+def decode_value(value):
+    if isinstance(value, list):
+        return [decode_value(v) for v in value]
+    if isinstance(value, dict) and value.get("__type__") in model_types:
+        obj = model_types[value["__type__"]]()
+        for k, v in value.items():
+            if k != "__type__":
+                setattr(obj, k, v)
+        return obj
+    return value
+
+
+def encode_message(message):
+    """
+    :param message: dictionary
+    :return: bytes containing one line
+    """
+
+    return (json.dumps({k: encode_value(v) for k, v in message.items()}, separators=(",", ":")) + "\n").encode()
+
+
+def decode_message(line):
+    """
+    :param line: bytes containing one line
+    :return: dictionary
+    """
+
+    return {k: decode_value(v) for k, v in json.loads(line.decode()).items()}
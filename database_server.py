@@ -0,0 +1,130 @@
+"""
+Local stand-in server exposing database object over protocol described in `database_protocol`. It can be used for
+testing `database_client.DatabaseClient` without real backend::
+
+    python3 database_server.py --port 8765 --users 5000
+"""
+
+import argparse
+import asyncio
+import os
+
+import database_protocol
+from fake_database import FakeDatabase
+
+allowed_methods = {"get_user", "get_item", "get_transactions", "buy_items", "transfer_money", "add_user",
+                   "edit_user", "add_item", "edit_item", "import_objects", "ping", "subscribe", "get_thumbnail"}
+
+
+class DatabaseServer:
+    def __init__(self, database, host="127.0.0.1", port=8765, path=None):
+        """
+        :param database: database object whose methods are called
+        :param host: address to listen on
+        :param port: port to listen on
+        :param path: path of Unix socket to listen on instead of TCP port (or None)
+        """
+
+        self.database = database
+        self.host = host
+        self.port = port
+        self.path = path
+        self.server = None
+        self.loop = None
+        self.subscribers = set()  # writers of connections subscribed to change notifications
+
+    async def handle_request(self, message, writer, write_lock):
+        response = {"id": message.get("id")}
+        method = message.get("method")
+        try:
+            if method not in allowed_methods:
+                raise ValueError("Unknown method " + str(method))
+            if method == "ping":
+                response["result"] = None
+            elif method == "subscribe":
+                self.subscribers.add(writer)
+                response["result"] = None
+            else:
+                function = getattr(self.database, method, None)
+                if function is None:
+                    raise NotImplementedError("Unsupported method " + method)
+                loop = asyncio.get_running_loop()
+                response["result"] = await loop.run_in_executor(None, lambda: function(*message.get("args", [])))
+        except Exception as e:
+            response["error"] = type(e).__name__ + ": " + str(e)
+        async with write_lock:
+            writer.write(database_protocol.encode_message(response))
+            await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(
+                    self.handle_request(database_protocol.decode_message(line), writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    def on_change(self, kind, obj):
+        """
+        Called by database (from any thread) when object changes.
+        """
+
+        self.loop.call_soon_threadsafe(self.broadcast, kind, obj)
+
+    def broadcast(self, kind, obj):
+        message = database_protocol.encode_message({"event": kind, "data": obj})
+        for writer in list(self.subscribers):
+            if writer.is_closing():
+                self.subscribers.discard(writer)
+            else:
+                writer.write(message)
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        if hasattr(self.database, "subscribe"):
+            self.database.subscribe(self.on_change)
+        if self.path is not None:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.server = await asyncio.start_unix_server(self.handle_connection, self.path)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        return self.server
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in database server serving synthetic data.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="mean latency of calls in seconds")
+    parser.add_argument("--write-interval", type=float, default=None,
+                        help="interval of simulated purchases by other kiosks in seconds")
+    parser.add_argument("--history-days", type=int, default=0, help="days of generated transaction history")
+    args = parser.parse_args(argv)
+
+    database = FakeDatabase(users=args.users, items=args.items, latency_mean=args.latency,
+                            write_interval=args.write_interval, history_days=args.history_days)
+    asyncio.run(DatabaseServer(database, args.host, args.port).serve_forever())
+
+
+if __name__ == '__main__':
+    main()
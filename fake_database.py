@@ -0,0 +1,300 @@
+"""
+Configurable stand-in for `database.Database` generating synthetic users and items. It can be used for profiling
+frontend under realistic load without live server::
+
+    SORTIMENT_FAKE_DATABASE=5000 python3 sortimentRUN.py
+"""
+
+import copy
+import os
+import random
+import struct
+import threading
+import time
+
+from database import User, Item
+
+first_names = ["Peter", "Jakub", "Ľubomír", "Šimon", "Žofia", "Čestmír", "Ďurko", "Mária", "Zuzana",
+               "Ondrej", "Tomáš", "Veronika", "Ľudmila", "Róbert", "Bohuš", "Štefan", "Ňaňo",
+               "Anička", "Kristína", "Matúš"]
+last_names = ["Novák", "Kováč", "Horváth", "Šťastný", "Čierny", "Žiak", "Bielik", "Ďurica",
+              "Lukáč", "Mráz", "Tóth", "Varga", "Ševčík", "Kráľ", "Baláž", "Šimko", "Hruška",
+              "Krčméry"]
+item_names = ["Horalky", "Pizza", "Mäsový šalát", "Kofola", "Tatranka", "Čokoláda", "Jogurt", "Rožok",
+              "Káva", "Čaj", "Minerálka", "Bageta", "Banán", "Jablko", "Keksy", "Študentská pečať",
+              "Zemiakové lupienky"]
+
+
+class FakeDatabaseError(Exception):
+    pass
+
+
+def write_bmp(path, width, height, color):
+    """
+    Writes uncompressed 24-bit BMP filled with single color.
+
+    :param path: output file
+    :param width: width in pixels
+    :param height: height in pixels
+    :param color: (r, g, b) tuple
+    """
+
+    row = bytes((color[2], color[1], color[0])) * width
+    row += b"\0" * ((4 - len(row) % 4) % 4)
+    data = row * height
+    header = struct.pack("<2sIHHI", b"BM", 54 + len(data), 0, 0, 54)
+    info = struct.pack("<IiiHHIIiiII", 40, width, height, 1, 24, 0, len(data), 2835, 2835, 0, 0)
+    with open(path, "wb") as f:
+        f.write(header + info + data)
+
+
+class FakeDatabase:
+    """
+    Database generating `users` users and `items` items. Every call is delayed according to latency distribution
+    and fails with probability `failure_rate`. When `write_interval` is set, background thread modifies balances of
+    random users as if other kiosks were buying items.
+    """
+
+    def __init__(self, users=1000, items=100, seed=0, latency="lognormal", latency_mean=0.2, latency_sigma=0.5,
+                 failure_rate=0.0, photo_dir=None, photo_count=20, write_interval=None, history_days=0,
+                 history_per_day=100):
+        """
+        :param users: number of users to generate
+        :param items: number of items to generate
+        :param seed: random seed
+        :param latency: latency distribution, one of "none", "fixed", "uniform", "lognormal"
+        :param latency_mean: mean latency of call in seconds
+        :param latency_sigma: sigma of lognormal distribution
+        :param failure_rate: probability that call raises `FakeDatabaseError`
+        :param photo_dir: directory where generated photos are stored (or None for users without photos)
+        :param photo_count: number of distinct photos to generate
+        :param write_interval: interval of concurrent writes in seconds (or None to disable them)
+        :param history_days: number of days of generated transaction history
+        :param history_per_day: number of generated transactions per day
+        """
+
+        self.random = random.Random(seed)
+        self.latency = latency
+        self.latency_mean = latency_mean
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.lock = threading.Lock()
+        self.transactions = list()
+        self.transfer_ids = set()  # ids of applied transfers
+        self.listeners = list()
+        photos = self.generate_photos(photo_dir, photo_count)
+        self.users = [self.generate_user(i + 1, photos) for i in range(users)]
+        self.items = [self.generate_item(i + 1, photos) for i in range(items)]
+        self.generate_history(history_days, history_per_day)
+        if write_interval is not None:
+            threading.Thread(target=self.concurrent_writer, args=(write_interval,), daemon=True).start()
+
+    def generate_photos(self, photo_dir, photo_count):
+        if photo_dir is None:
+            return [None]
+        os.makedirs(photo_dir, exist_ok=True)
+        photos = list()
+        for i in range(photo_count):
+            path = os.path.join(photo_dir, "photo" + str(i) + ".bmp")
+            if not os.path.exists(path):
+                write_bmp(path, 200, 200, tuple(self.random.randrange(256) for _ in range(3)))
+            photos.append(path)
+        return photos
+
+    def generate_user(self, id, photos):
+        first = self.random.choice(first_names)
+        last = self.random.choice(last_names)
+        nick = first if self.random.random() < 0.5 else first[:3] + last[:3]
+        return User(id, nick=nick + str(id), name=first + " " + last, photo=self.random.choice(photos),
+                    balance=self.random.randint(-2000, 10000))
+
+    def generate_item(self, id, photos):
+        name = self.random.choice(item_names)
+        if id > len(item_names):
+            name += " " + str(id)
+        return Item(id, name=name, price=self.random.randint(10, 500), photo=self.random.choice(photos),
+                    barcode="858" + str(id).zfill(10))
+
+    def generate_history(self, days, per_day):
+        now = time.time()
+        start = now - days * 86400
+        count = days * per_day
+        times = sorted(self.random.uniform(start, now) for _ in range(count))
+        for t in times:
+            user = self.random.choice(self.users)
+            item = self.random.choice(self.items)
+            self.transactions.append((user.id, item.id, self.random.randint(1, 3), item.price, t))
+
+    def simulate_call(self):
+        """
+        Sleeps according to latency distribution and raises `FakeDatabaseError` with probability `failure_rate`.
+        """
+
+        with self.lock:
+            if self.latency == "fixed":
+                delay = self.latency_mean
+            elif self.latency == "uniform":
+                delay = self.random.uniform(0, 2 * self.latency_mean)
+            elif self.latency == "lognormal":
+                delay = self.random.lognormvariate(0, self.latency_sigma) * self.latency_mean
+            else:
+                delay = 0
+            fail = self.random.random() < self.failure_rate
+        time.sleep(delay)
+        if fail:
+            raise FakeDatabaseError("Simulated database failure.")
+
+    def subscribe(self, callback):
+        """
+        Registers callback called with (kind, object) after every change, kind is "user" or "item".
+        Callback is called from thread which made the change.
+
+        :param callback: function
+        """
+
+        self.listeners.append(callback)
+
+    def notify(self, kind, obj):
+        """
+        Calls listeners with copy of changed object. Lock must not be held by caller.
+        """
+
+        obj = copy.deepcopy(obj)
+        for listener in self.listeners:
+            listener(kind, obj)
+
+    def concurrent_writer(self, interval):
+        while True:
+            time.sleep(interval)
+            with self.lock:
+                user = self.random.choice(self.users)
+                item = self.random.choice(self.items)
+                user.balance -= item.price
+                self.transactions.append((user.id, item.id, 1, item.price, time.time()))
+            self.notify("user", user)
+
+    def find(self, objects, id):
+        for obj in objects:
+            if obj.id == id:
+                return obj
+        raise FakeDatabaseError("Object with id " + str(id) + " does not exist.")
+
+    def get_user(self, _=None):
+        self.simulate_call()
+        with self.lock:
+            return copy.deepcopy(self.users)
+
+    def get_item(self, _=None):
+        self.simulate_call()
+        with self.lock:
+            return copy.deepcopy(self.items)
+
+    def buy_items(self, user_id, item_id, amount, price=None):
+        self.simulate_call()
+        with self.lock:
+            user = self.find(self.users, user_id)
+            item = self.find(self.items, item_id)
+            if price is None:
+                price = item.price
+            user.balance -= price * amount
+            self.transactions.append((user_id, item_id, amount, price, time.time()))
+        self.notify("user", user)
+
+    def find_first_since(self, since):
+        """
+        Binary search of transactions ordered by time (bisect supports key only since Python 3.10).
+        Lock must be held by caller.
+
+        :param since: time
+        :return: index of first transaction made at since or later
+        """
+
+        low, high = 0, len(self.transactions)
+        while low < high:
+            middle = (low + high) // 2
+            if self.transactions[middle][4] < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get_transactions(self, since=None, limit=None, offset=0):
+        self.simulate_call()
+        with self.lock:
+            start = 0 if since is None else self.find_first_since(since)
+            start += offset
+            return self.transactions[start:None if limit is None else start + limit]
+
+    def transfer_money(self, transfers):
+        self.simulate_call()
+        now = time.time()
+        with self.lock:
+            new_transfers = [t for t in transfers if t[0] not in self.transfer_ids]
+            involved = [user_id for _, from_user_id, to_user_id, _ in new_transfers
+                        for user_id in (from_user_id, to_user_id) if user_id is not None]
+            changed = {user_id: self.find(self.users, user_id) for user_id in involved}
+            for transfer_id, from_user_id, to_user_id, amount in new_transfers:
+                self.transfer_ids.add(transfer_id)
+                # transfers are recorded as purchases without item with price equal to paid amount
+                if from_user_id is not None:
+                    changed[from_user_id].balance -= amount
+                    self.transactions.append((from_user_id, None, 1, amount, now))
+                if to_user_id is not None:
+                    changed[to_user_id].balance += amount
+                    self.transactions.append((to_user_id, None, 1, -amount, now))
+        for user in changed.values():
+            self.notify("user", user)
+
+    def add_user(self, user):
+        self.simulate_call()
+        with self.lock:
+            user = copy.copy(user)
+            user.id = max((u.id for u in self.users), default=0) + 1
+            if user.balance is None:
+                user.balance = 0
+            self.users.append(user)
+        self.notify("user", user)
+        return user.id
+
+    def edit_user(self, user):
+        self.simulate_call()
+        with self.lock:
+            index = self.users.index(self.find(self.users, user.id))
+            self.users[index] = copy.copy(user)
+        self.notify("user", user)
+
+    def add_item(self, item):
+        self.simulate_call()
+        with self.lock:
+            item = copy.copy(item)
+            item.id = max((i.id for i in self.items), default=0) + 1
+            self.items.append(item)
+        self.notify("item", item)
+        return item.id
+
+    def import_objects(self, users, items):
+        self.simulate_call()
+        with self.lock:
+            user_id = max((u.id for u in self.users), default=0)
+            item_id = max((i.id for i in self.items), default=0)
+            new_users = [copy.copy(user) for user in users]
+            new_items = [copy.copy(item) for item in items]
+            for user in new_users:
+                user_id += 1
+                user.id = user_id
+                if user.balance is None:
+                    user.balance = 0
+            for item in new_items:
+                item_id += 1
+                item.id = item_id
+            self.users.extend(new_users)
+            self.items.extend(new_items)
+        self.notify("reset", None)
+        return [user.id for user in new_users], [item.id for item in new_items]
+
+    def edit_item(self, item):
+        self.simulate_call()
+        with self.lock:
+            index = self.items.index(self.find(self.items, item.id))
+            self.items[index] = copy.copy(item)
+        self.notify("item", item)
@@ -0,0 +1,118 @@
+"""
+Exports users (with balances), items or transaction history to CSV or JSON Lines for accounting::
+
+    python3 sortimentEXPORT.py transactions --upstream backend:8765 --since 2024-01-01 --output january.csv
+    python3 sortimentEXPORT.py users --format jsonl
+
+Rows are written as they are read and history is fetched in chunks, so memory use doesn't depend on its size.
+Amounts of money are in cents, times are seconds since epoch.
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+
+import database_factory
+
+user_fields = ("id", "nick", "name", "balance")
+item_fields = ("id", "name", "price", "barcode")
+transaction_fields = ("user_id", "item_id", "amount", "price", "time")
+
+
+def iter_transactions(database, since=None, chunk_size=10000):
+    """
+    Reads transaction history in chunks.
+
+    :param database: database object
+    :param since: time (seconds since epoch) of oldest transaction (or None for all)
+    :param chunk_size: number of transactions read by one request
+    :return: generator of (user id, item id or None, amount, price, time), oldest first
+    """
+
+    offset = 0
+    while True:
+        chunk = database.get_transactions(since, chunk_size, offset)
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        offset += len(chunk)
+
+
+def iter_rows(database, kind, since=None, chunk_size=10000):
+    """
+    :param database: database object
+    :param kind: "users", "items" or "transactions"
+    :param since: time of oldest exported transaction (or None for all)
+    :param chunk_size: number of transactions read by one request
+    :return: (tuple of field names, generator of rows)
+    """
+
+    if kind == "users":
+        return user_fields, ((user.id, user.nick, user.name, user.balance) for user in database.get_user())
+    if kind == "items":
+        return item_fields, ((item.id, item.name, item.price, getattr(item, "barcode", None))
+                             for item in database.get_item(None))
+    if kind == "transactions":
+        return transaction_fields, (tuple(t) for t in iter_transactions(database, since, chunk_size))
+    raise ValueError("Unknown kind: " + kind)
+
+
+def write_csv(f, fields, rows):
+    writer = csv.writer(f)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow(["" if value is None else value for value in row])
+
+
+def write_jsonl(f, fields, rows):
+    for row in rows:
+        f.write(json.dumps(dict(zip(fields, row)), ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def parse_time(text):
+    """
+    :param text: seconds since epoch or ISO date (local time)
+    :return: seconds since epoch
+    """
+
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.datetime.fromisoformat(text).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export of users, items or transactions.")
+    parser.add_argument("kind", choices=("users", "items", "transactions"), help="exported data")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv", help="output format")
+    parser.add_argument("--output", help="output file (default is standard output)")
+    parser.add_argument("--since", type=parse_time, help="oldest exported transaction (ISO date or epoch seconds)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="transactions read by one request")
+    parser.add_argument("--socket", help="path of Unix socket of local cache daemon")
+    parser.add_argument("--upstream", help="host:port of database server")
+    parser.add_argument("--fake", type=int, help="use synthetic database with given number of users instead")
+    args = parser.parse_args(argv)
+
+    database = database_factory.create_database(socket=args.socket, address=args.upstream, fake=args.fake,
+                                                latency="none", history_days=365)
+    fields, rows = iter_rows(database, args.kind, args.since, args.chunk_size)
+    write = write_csv if args.format == "csv" else write_jsonl
+    if args.output is not None:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            write(f, fields, rows)
+        return 0
+    try:
+        write(sys.stdout, fields, rows)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # reader (for example head) exited, output is redirected to devnull so flush at exit doesn't fail again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1 +1,3 @@
-__all__ = ['gtk_element_editor', 'main_window_handler', 'sortiment', 'window_creator', 'error_handler']
+__all__ = ['gtk_element_editor', 'main_window_handler', 'sortiment', 'window_creator', 'error_handler', 'snapshot',
+           'instrumentation', 'watchdog', 'search_index', 'ranking', 'barcode', 'single_flight', 'thumbnail_atlas',
+           'capture', 'config', 'ledger', 'reporting', 'forecast']
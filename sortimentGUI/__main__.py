@@ -1,16 +1,47 @@
+import os
 import sys
 
-from database import Database
+import database_factory
 from gi.repository import Gtk
+from . import instrumentation
 from . import window_creator
+from .config import load_config
 from .error_handler import catch_global_exception, catch_global_exception_with_gtk_main
+from .gtk_element_editor import run_in_main_loop
+from .single_flight import SingleFlightDatabase
+from .watchdog import Watchdog
 from .window_handler import WindowHandler
 
 
+def create_database(config):
+    """
+    Creates database used by frontend. If `cache_socket` is set to path of Unix socket of local cache daemon, it is
+    used. If `database_address` is set to host:port, networked client is used. If `fake_database` is set to number of
+    users, synthetic database is used instead (for profiling). These tunables can be also set by environment
+    variables SORTIMENT_CACHE_SOCKET, SORTIMENT_DATABASE_ADDRESS and SORTIMENT_FAKE_DATABASE.
+
+    :param config: config.Config
+    :return: database object
+    """
+
+    return database_factory.create_database(
+        socket=config.cache_socket, address=config.database_address, fake=config.fake_database,
+        pool_size=config.database_pool_size, timeout=config.database_timeout,
+        photo_dir=os.path.join(os.path.expanduser("~"), ".cache", "sortiment", "fake_photos"), write_interval=1,
+        history_days=365)
+
+
 def main():
     sys.excepthook = catch_global_exception_with_gtk_main
-    window_creator.create_window_main(WindowHandler(), Database())
+    config = load_config()
+    handler = WindowHandler()
+    handler.set_config(config)
+    database = instrumentation.wrap_database(SingleFlightDatabase(create_database(config)))
+    window_creator.create_window_main(handler, database)
     sys.excepthook = catch_global_exception
+    instrumentation.start()
+    Watchdog(config.watchdog_threshold).start()
+    run_in_main_loop(config.watch)  # after main window is shown
     Gtk.main()
 
 if __name__ == '__main__':
@@ -0,0 +1,36 @@
+class BarcodeReader:
+    """
+    Collects characters typed by keyboard-wedge barcode scanner. Scanner types whole code very fast and ends it with
+    Enter, so characters typed slower than `max_interval` are considered typed by human and are discarded.
+    """
+
+    def __init__(self, max_interval=50, min_length=4):
+        """
+        :param max_interval: maximal interval between characters of one code in milliseconds
+        :param min_length: minimal length of code
+        """
+
+        self.max_interval = max_interval
+        self.min_length = min_length
+        self.buffer = list()
+        self.last_time = None
+
+    def feed(self, char, timestamp):
+        """
+        Processes one typed character.
+
+        :param char: typed character, "\\n" for Enter
+        :param timestamp: time of key press in milliseconds
+        :return: scanned code if this character completed it, None otherwise
+        """
+
+        if self.last_time is not None and timestamp - self.last_time > self.max_interval:
+            self.buffer = list()
+        self.last_time = timestamp
+        if char == "\n":
+            code = "".join(self.buffer)
+            self.buffer = list()
+            return code if len(code) >= self.min_length else None
+        if char is not None and char.isprintable():
+            self.buffer.append(char)
+        return None
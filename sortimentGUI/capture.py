@@ -0,0 +1,75 @@
+import os
+import shlex
+
+from gi.repository import GLib
+from gi.repository import Gio
+
+image_extensions = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp")
+
+
+class PhotoCapture:
+    """
+    Runs external capture program (for example webcam application) without blocking main loop and watches directory
+    where it saves photos, so newest photo is known without scanning the directory.
+    """
+
+    def __init__(self):
+        self.pid = None
+        self.monitor = None
+        self.newest = None  # path of last photo created while capture program runs
+        self.callback = None
+
+    @property
+    def running(self):
+        return self.pid is not None
+
+    def start(self, command, directory, callback):
+        """
+        Starts capture program. Callback is called from main loop when program exits.
+
+        :param command: command line of capture program
+        :param directory: directory where program saves photos
+        :param callback: function called with path of new photo, or None if no photo was taken
+        :return: True if program was started, False otherwise
+        """
+
+        if self.running:
+            return False
+        self.newest = None
+        self.callback = callback
+        try:
+            self.monitor = Gio.File.new_for_path(directory).monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
+            self.monitor.connect("changed", self.event_file_changed)
+        except GLib.Error:
+            self.monitor = None
+        try:
+            self.pid = GLib.spawn_async(shlex.split(command),
+                                        flags=GLib.SpawnFlags.SEARCH_PATH | GLib.SpawnFlags.DO_NOT_REAP_CHILD)[0]
+        except (GLib.Error, ValueError):
+            self.stop_monitor()
+            return False
+        GLib.child_watch_add(GLib.PRIORITY_DEFAULT, self.pid, self.event_exited)
+        return True
+
+    def event_file_changed(self, _, file, other_file, event_type):
+        if event_type in (Gio.FileMonitorEvent.CREATED, Gio.FileMonitorEvent.CHANGES_DONE_HINT):
+            path = file.get_path()
+        elif event_type in (Gio.FileMonitorEvent.MOVED_IN, Gio.FileMonitorEvent.RENAMED) and other_file is not None:
+            path = other_file.get_path()
+        else:
+            return
+        if path is not None and path.lower().endswith(image_extensions) and not os.path.basename(path).startswith("."):
+            self.newest = path
+
+    def event_exited(self, pid, _):
+        GLib.spawn_close_pid(pid)
+        self.pid = None
+        self.stop_monitor()
+        callback, self.callback = self.callback, None
+        if callback is not None:
+            callback(self.newest if self.newest is not None and os.path.isfile(self.newest) else None)
+
+    def stop_monitor(self):
+        if self.monitor is not None:
+            self.monitor.cancel()
+            self.monitor = None
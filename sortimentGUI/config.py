@@ -0,0 +1,171 @@
+"""
+Configuration of frontend loaded from ``config.txt``. First line is command of capture program, second line is
+directory where it saves photos (``%user%`` is replaced by name of current user). Following lines may set tunables
+as ``name = value``, lines starting with ``#`` are ignored. Tunable can be also overridden by environment variable
+``SORTIMENT_<NAME>``, for example ``SORTIMENT_SEARCH_LIMIT=20``.
+"""
+
+import logging
+import os
+
+from . import data_manipulation
+
+logger = logging.getLogger(__name__)
+
+default_config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.txt")
+
+# name -> default value, values are converted to type of default value
+tunables = {
+    "image_size": 75,  # size of images of selected user or food in standard window
+    "row_image_size": 50,  # size of images in user and food list
+    "search_limit": 50,  # maximal number of results of fuzzy search
+    "usual_items_count": 3,  # number of buttons for buying usual items
+    "snapshot_dir": "",  # directory with snapshots, ranking and thumbnail atlases (empty for default)
+    "database_address": "",  # host:port of database server
+    "cache_socket": "",  # path of Unix socket of local cache daemon
+    "fake_database": 0,  # number of users of synthetic database (0 to disable)
+    "database_pool_size": 4,  # maximal number of connections to database server
+    "database_timeout": 10.0,  # timeout of database requests in seconds
+    "watchdog_threshold": 2.0,  # stall duration in seconds after which stack is logged (0 to disable watchdog)
+    "stock_horizon_days": 3.0,  # items whose stock lasts shorter than this number of days are reported
+}
+
+
+def parse_value(name, text):
+    """
+    :param name: name of tunable
+    :param text: value from config file or environment
+    :return: value converted to type of default value
+    :raise ValueError: if value can't be converted
+    """
+
+    default = tunables[name]
+    if isinstance(default, bool):
+        return text.strip().lower() in ("1", "true", "yes", "on")
+    return type(default)(text.strip())
+
+
+class Config:
+    """
+    Parsed configuration. File is parsed only when it changed, values (including expanded paths) are kept as
+    attributes. Call `watch` to reload it automatically when file changes.
+    """
+
+    def __init__(self, path=default_config_path, environ=None):
+        """
+        :param path: path to config file
+        :param environ: mapping with environment variables (or None for os.environ)
+        """
+
+        self.path = path
+        self.environ = os.environ if environ is None else environ
+        self.stamp = None  # (mtime, size) of parsed file
+        self.monitor = None
+        self.listeners = list()
+        self.capture_command = None
+        self.capture_dir = None
+        for name, value in tunables.items():
+            setattr(self, name, value)
+        self.load()
+
+    def load(self):
+        """
+        Parses config file if it changed since last load.
+
+        :return: True if file was parsed, False otherwise
+        """
+
+        try:
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self.stamp and self.capture_command is not None:
+            return False
+        self.stamp = stamp
+        lines = list()
+        if stamp is not None:
+            try:
+                with open(self.path, "r") as f:
+                    lines = f.read().split("\n")
+            except OSError as e:
+                logger.warning("Can't read config %s: %s", self.path, e)
+        values = dict(tunables)
+        for line in lines[2:]:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, sep, text = line.partition("=")
+            name = name.strip()
+            if not sep or name not in tunables:
+                logger.warning("Unknown config line: %s", line)
+                continue
+            try:
+                values[name] = parse_value(name, text)
+            except ValueError:
+                logger.warning("Invalid value of %s: %s", name, text.strip())
+        for name in tunables:
+            text = self.environ.get("SORTIMENT_" + name.upper())
+            if text:
+                try:
+                    values[name] = parse_value(name, text)
+                except ValueError:
+                    logger.warning("Invalid value of SORTIMENT_%s: %s", name.upper(), text)
+        self.capture_command = data_manipulation.expand_username(lines[0].strip()) if len(lines) > 0 else ""
+        self.capture_dir = data_manipulation.expand_username(lines[1].strip()) if len(lines) > 1 else ""
+        for name, value in values.items():
+            setattr(self, name, value)
+        return True
+
+    def reload(self):
+        """
+        Loads config again and notifies listeners if it changed.
+        """
+
+        if self.load():
+            for listener in list(self.listeners):
+                listener(self)
+
+    def subscribe(self, callback):
+        """
+        :param callback: function called with config from main loop when config is reloaded
+        """
+
+        self.listeners.append(callback)
+
+    def watch(self):
+        """
+        Starts watching config file, so it's reloaded when it changes. Needs running GLib main loop.
+        """
+
+        from gi.repository import GLib
+        from gi.repository import Gio
+
+        if self.monitor is not None:
+            return
+        try:
+            self.monitor = Gio.File.new_for_path(self.path).monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GLib.Error as e:
+            logger.warning("Can't watch config %s: %s", self.path, e)
+            return
+        self.monitor.connect("changed", self.event_file_changed)
+
+    def event_file_changed(self, *_):
+        self.reload()
+
+
+_config = None
+
+
+def load_config(path=None):
+    """
+    Gets configuration shared by whole frontend (parsed on first call).
+
+    :param path: path to config file (or None for default), used only on first call
+    :return: Config
+    """
+
+    global _config
+    if _config is None:
+        _config = Config(path or default_config_path)
+    return _config
@@ -1,4 +1,8 @@
+import collections
+import functools
 import getpass
+import operator
+import re
 import string
 import unicodedata
 from math import sqrt
@@ -105,6 +109,23 @@ def get_all_names(obj):
     return res
 
 
+def get_search_keys(obj):
+    """
+    Returns all strings which can be used to find object by filter: all names and category and barcode if object has
+    them.
+
+    :param obj: user or food
+    :return: list of strings
+    """
+
+    res = get_all_names(obj)
+    for attr in ("category", "barcode"):
+        value = getattr(obj, attr, None)
+        if value is not None:
+            res.append(str(value))
+    return res
+
+
 def normalize_string(s, lowercase=True, special=True):
     output = ''
     if special:
@@ -120,13 +141,188 @@ def normalize_string(s, lowercase=True, special=True):
     return output
 
 
+def matches_filter(obj, regex_obj):
+    """
+    Checks if any of normalized names of object matches filter regex.
+
+    :param obj: user or food
+    :param regex_obj: compiled regex or None
+    :return: True if object should be displayed, False otherwise
+    """
+
+    if regex_obj is None:
+        return True
+    for name in get_search_keys(obj):
+        if regex_obj.search(normalize_string(name)) is not None:
+            return True
+    return False
+
+
+_cents_strings = tuple("{:02d}".format(cents) for cents in range(100))
+_money_regex = re.compile(r"([+-]?)([0-9]*)(?:[.,]([0-9]{0,2}))?")
+
+
+@functools.lru_cache(maxsize=4096)
 def format_money(number, separator=",", currency=default_currency):
-    return ("-" if number < 0 else "") + str(abs(number) // 100) + separator + "{:02d}".format(
-        abs(number) % 100) + currency
+    """
+    Formats amount of money. Results are cached, because the same prices and balances are formatted repeatedly.
+
+    :param number: amount in cents (int or Money)
+    :param separator: separator of cents
+    :param currency: string appended to amount
+    :return: formatted amount, for example "-1,05€"
+    """
+
+    whole, cents = divmod(abs(int(number)), 100)
+    return ("-" if number < 0 else "") + str(whole) + separator + _cents_strings[cents] + currency
+
+
+def parse_money(text, currency=default_currency):
+    """
+    Parses amount of money. Accepts whole units ("12", "1."), or units with one or two decimal places separated by dot
+    or comma ("1.5", "1,05"), optionally with sign and currency.
+
+    :param text: string to parse
+    :param currency: currency which may follow amount
+    :return: amount in cents
+    :raise ValueError: if text is not valid amount
+    """
+
+    stripped = text.strip()
+    if currency and stripped.endswith(currency):
+        stripped = stripped[:-len(currency)].rstrip()
+    match = _money_regex.fullmatch(stripped)
+    if match is None or (match.group(2) == "" and not match.group(3)):
+        raise ValueError("Invalid amount of money: " + repr(text))
+    sign, whole, cents = match.groups()
+    result = int(whole or "0") * 100 + int((cents or "0").ljust(2, "0"))
+    return -result if sign == "-" else result
+
+
+@functools.total_ordering
+class Money:
+    """
+    Immutable amount of money in whole cents. Models keep plain ints (they are sent to database and saved in
+    snapshots), Money is used where amounts are computed, parsed and displayed.
+    """
+
+    __slots__ = ("cents",)
+
+    def __init__(self, cents=0):
+        if not isinstance(cents, int) or isinstance(cents, bool):
+            raise TypeError("Money must be created from whole cents, not " + type(cents).__name__)
+        object.__setattr__(self, "cents", cents)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Money is immutable")
+
+    def __reduce__(self):
+        # default pickling (and copying) restores slots by setattr, which is blocked
+        return Money, (self.cents,)
+
+    @classmethod
+    def parse(cls, text, currency=default_currency):
+        """
+        See `parse_money`.
+        """
+
+        return cls(parse_money(text, currency))
+
+    def format(self, separator=",", currency=default_currency):
+        return format_money(self.cents, separator, currency)
+
+    def __str__(self):
+        return format_money(self.cents)
+
+    def __repr__(self):
+        return "Money(" + str(self.cents) + ")"
+
+    def __int__(self):
+        return self.cents
+
+    def __hash__(self):
+        return hash(self.cents)
+
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self.cents == other.cents
+        if isinstance(other, int):
+            return self.cents == other
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, Money):
+            return self.cents < other.cents
+        if isinstance(other, int):
+            return self.cents < other
+        return NotImplemented
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def __neg__(self):
+        return Money(-self.cents)
+
+    def __add__(self, other):
+        if isinstance(other, (Money, int)) and not isinstance(other, bool):
+            return Money(self.cents + int(other))
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, (Money, int)) and not isinstance(other, bool):
+            return Money(self.cents - int(other))
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if isinstance(other, int) and not isinstance(other, bool):
+            return Money(other - self.cents)
+        return NotImplemented
+
+    def __mul__(self, other):
+        if isinstance(other, int) and not isinstance(other, bool):
+            return Money(self.cents * other)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+
+def basket_total(prices, amounts):
+    """
+    Computes price of bought items. Products are summed by `map` and `sum`, without loop in Python code.
+
+    :param prices: iterable of prices of items in cents (ints or Money)
+    :param amounts: iterable of bought amounts of respective items
+    :return: total price as Money
+    """
+
+    return Money(sum(map(operator.mul, map(int, prices), amounts)))
+
+
+def transfer_totals(transfers):
+    """
+    Computes net change of balance of every user from ledger transfers.
+
+    :param transfers: iterable of transfers (dictionaries with "from", "to" and "amount")
+    :return: dictionary user id -> change of balance in cents, cash (None) is left out
+    """
+
+    totals = collections.Counter()
+    for transfer in transfers:
+        totals[transfer["from"]] -= transfer["amount"]
+        totals[transfer["to"]] += transfer["amount"]
+    totals.pop(None, None)
+    return dict(totals)
+
+
+@functools.lru_cache(maxsize=None)
+def get_username():
+    return getpass.getuser()
 
 
 def expand_username(text):
-    return text.replace("%user%", getpass.getuser())
+    return text.replace("%user%", get_username())
 
 
 def compute_scaling_factor(awidth, aheight, standard_window_width, standard_window_height):
@@ -134,11 +330,10 @@ def compute_scaling_factor(awidth, aheight, standard_window_width, standard_wind
 
 
 def price_string_to_int(s):
-    seppos = s.find(".")
-    if seppos < 0:
-        seppos = s.find(",")
-    if seppos >= 0:
-        r = s[:seppos] + s[seppos + 1:seppos + 3]
-    else:
-        r = int(s) * 100
-    return int(r)
+    """
+    :param s: price, for example "1,5"
+    :return: price in cents
+    :raise ValueError: if s is not valid price
+    """
+
+    return parse_money(s)
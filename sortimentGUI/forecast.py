@@ -0,0 +1,195 @@
+"""
+Consumption rates of items and forecast of remaining stock. Rates are computed from sales made on this kiosk, so
+restocking can be planned without querying database.
+
+Database doesn't know stock, so it's counted by hand and written to ``stock.json`` in snapshot directory as
+``{"<item id>": {"quantity": <pieces>, "time": <unix time of count>}}``. Sales recorded after count are subtracted
+from counted quantity. File is read again when it changes.
+"""
+
+import json
+import logging
+import math
+import os
+import pickle
+import threading
+import time
+
+from . import ranking
+from . import snapshot
+
+logger = logging.getLogger(__name__)
+
+day_seconds = 86400
+default_half_life = 7 * day_seconds  # sales lose half of weight after one week
+
+
+def get_stock_path(snapshot_dir=None):
+    """
+    :param snapshot_dir: directory containing snapshots (or None for default)
+    :return: path to file with counted stock
+    """
+
+    if snapshot_dir is None:
+        snapshot_dir = snapshot.default_snapshot_dir
+    return os.path.join(snapshot_dir, "stock.json")
+
+
+class ConsumptionForecast:
+    """
+    Time decayed sales of items, updated in constant time by every sale.
+
+    Sales are counted by `ranking.DecayClock`, same as purchases in `ranking.UsageRanking`. Rate is decayed score
+    divided by decayed length of observed period, so it's average of sold pieces per day weighted towards recent
+    days.
+    """
+
+    def __init__(self, half_life=default_half_life, start_time=None):
+        """
+        :param half_life: half life of sale weight in seconds
+        :param start_time: time when recording of sales started (or None for now)
+        """
+
+        self.clock = ranking.DecayClock(half_life)
+        self.start_time = time.time() if start_time is None else start_time
+        self.scores = dict()  # item id -> score
+        self.stock = dict()  # item id -> (counted quantity, time of count)
+        self.sold = dict()  # item id -> pieces sold after stock was counted
+        self.stock_mtime = None  # modification time of loaded stock file
+        self.lock = threading.Lock()
+
+    def record(self, item_id, amount=1, timestamp=None):
+        """
+        Records sale.
+
+        :param item_id: id of sold item
+        :param amount: number of sold pieces, sales of no pieces are ignored
+        :param timestamp: time of sale (or None for now)
+        """
+
+        if amount <= 0:
+            return
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            score = self.clock.weight(amount, timestamp, lambda: [self.scores])
+            self.scores[item_id] = self.scores.get(item_id, 0) + score
+            count = self.stock.get(item_id)
+            if count is not None and timestamp >= count[1]:
+                self.sold[item_id] = self.sold.get(item_id, 0) + amount
+
+    def set_stock(self, item_id, quantity, timestamp=None):
+        """
+        Sets counted stock of item.
+
+        :param item_id: id of item
+        :param quantity: counted pieces
+        :param timestamp: time of count (or None for now)
+        """
+
+        with self.lock:
+            self.stock[item_id] = (quantity, time.time() if timestamp is None else timestamp)
+            self.sold[item_id] = 0
+
+    def load_stock(self, path):
+        """
+        Reads counted stock from file if it changed since last call. Counts which weren't changed are kept with
+        sales recorded after them.
+
+        :param path: path to stock file
+        """
+
+        try:
+            mtime = os.stat(path).st_mtime
+            if mtime == self.stock_mtime:
+                return
+            with open(path, "r") as f:
+                counts = json.load(f)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning("Can't read stock %s: %s", path, e)
+            return
+        self.stock_mtime = mtime
+        for key, count in counts.items():
+            try:
+                item_id, quantity, timestamp = int(key), count["quantity"], count.get("time", mtime)
+            except (ValueError, TypeError, KeyError):
+                logger.warning("Invalid stock of item %s in %s", key, path)
+                continue
+            if self.stock.get(item_id) != (quantity, timestamp):
+                self.set_stock(item_id, quantity, timestamp)
+
+    def rate(self, item_id, timestamp=None):
+        """
+        :param item_id: id of item
+        :param timestamp: time (or None for now)
+        :return: sold pieces per day
+        """
+
+        if timestamp is None:
+            timestamp = time.time()
+        half_life = self.clock.half_life
+        # integral of weights over observed period, at least one day so first sales don't look like huge rate
+        period = half_life / math.log(2) * (1 - math.pow(2, -(timestamp - self.start_time) / half_life))
+        return self.clock.decayed(self.scores.get(item_id, 0), timestamp) * day_seconds / max(period, day_seconds)
+
+    def remaining(self, item_id):
+        """
+        :param item_id: id of item
+        :return: estimated pieces in stock, or None if stock wasn't counted
+        """
+
+        count = self.stock.get(item_id)
+        if count is None:
+            return None
+        return count[0] - self.sold.get(item_id, 0)
+
+    def low_stock(self, horizon_days, timestamp=None):
+        """
+        Finds items likely to run out.
+
+        :param horizon_days: items which last shorter than this number of days are returned
+        :param timestamp: time (or None for now)
+        :return: list of (item id, remaining pieces, pieces per day, days left), soonest first
+        """
+
+        result = list()
+        with self.lock:
+            for item_id in list(self.stock):
+                remaining = self.remaining(item_id)
+                rate = self.rate(item_id, timestamp)
+                if remaining <= 0:
+                    days_left = 0.0
+                elif rate > 0:
+                    days_left = remaining / rate
+                else:
+                    continue
+                if days_left < horizon_days:
+                    result.append((item_id, remaining, rate, days_left))
+        result.sort(key=lambda x: (x[3], x[0]))
+        return result
+
+    def save(self, snapshot_dir=None):
+        with self.lock:
+            data = pickle.dumps((self.clock.half_life, self.clock.reference_time, self.start_time, self.scores,
+                                 self.stock, self.sold), protocol=pickle.HIGHEST_PROTOCOL)
+        return snapshot.write_atomic(snapshot.get_snapshot_path("forecast", snapshot_dir), data)
+
+
+def load_forecast(snapshot_dir=None):
+    """
+    Loads forecast saved by `ConsumptionForecast.save`.
+
+    :param snapshot_dir: directory containing snapshots (or None for default)
+    :return: loaded forecast, or empty forecast if it wasn't saved yet
+    """
+
+    forecast = ConsumptionForecast()
+    try:
+        with open(snapshot.get_snapshot_path("forecast", snapshot_dir), "rb") as f:
+            (half_life, reference_time, forecast.start_time, forecast.scores, forecast.stock,
+             forecast.sold) = pickle.load(f)
+        forecast.clock = ranking.DecayClock(half_life, reference_time)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        return ConsumptionForecast()
+    return forecast
@@ -1,17 +1,21 @@
 from gi.repository import GObject
+from gi.repository import Gdk
+from gi.repository import GLib
 from gi.repository import GdkPixbuf
 from gi.repository import Gtk
 from gi.repository import Pango
 
 from . import data_manipulation
+from .instrumentation import instrument
 
 
 def create_button(text=""):
     return Gtk.Button(text)
 
 
+@instrument
 def create_user_row(user, selection_callback=None, register_dynamic_font_callback=None,
-                    image_height=50, display_string=None):  # todo: request image size
+                    image_height=50, display_string=None, atlas=None, decode_missing=True):  # todo: request image size
     """
     Creates ListBoxRow to display user nick or name and image.
 
@@ -20,6 +24,9 @@ def create_user_row(user, selection_callback=None, register_dynamic_font_callbac
     :param register_dynamic_font_callback: callback for registering label of row
     :param image_height: height of profile image in pixels
     :param display_string: String to override user name or None
+    :param atlas: thumbnail_atlas.ThumbnailAtlas containing image of user (or None)
+    :param decode_missing: True if photo not contained in atlas should be decoded, False to show placeholder until
+        `update_row_image` is called
     :return: new Gtk.ListBoxRow
     """
 
@@ -31,13 +38,16 @@ def create_user_row(user, selection_callback=None, register_dynamic_font_callbac
     label = Gtk.Label(display_string, xalign=0)
     image = Gtk.Image()
     image.set_from_icon_name("gtk-missing-image", 6)
-    load_image_from_file(image, user.photo, image_height, image_height)
+    if not load_image_from_atlas(image, atlas, user, image_height) and decode_missing:
+        load_image_from_file(image, user.photo, image_height, image_height)
     hbox.pack_start(image, False, True, 0)
     hbox.pack_start(label, True, True, 0)
     event_box.add(hbox)
     if selection_callback is not None:
         event_box.connect("button_press_event", selection_callback, user)
     row.user = user
+    row.label = label
+    row.image = image
     row.add(event_box)
     if register_dynamic_font_callback is not None:
         register_dynamic_font_callback(label, 0.6)
@@ -45,7 +55,8 @@ def create_user_row(user, selection_callback=None, register_dynamic_font_callbac
 
 
 def create_food_row(food, selection_callback,
-                    register_dynamic_font_callback=None, image_height=50, display_string=None):
+                    register_dynamic_font_callback=None, image_height=50, display_string=None, atlas=None,
+                    decode_missing=True):
     """
     Creates ListBoxRow to display food name and image.
 
@@ -54,6 +65,8 @@ def create_food_row(food, selection_callback,
     :param register_dynamic_font_callback: function to be called to register resizable font inside row (if needed)
     :param image_height: height of image of food
     :param display_string: String to override food name or None
+    :param atlas: thumbnail_atlas.ThumbnailAtlas containing image of food (or None)
+    :param decode_missing: see `create_user_row`
     :return: new ListBoxRow according to user data and callback function
     """
 
@@ -61,7 +74,47 @@ def create_food_row(food, selection_callback,
         display_string = data_manipulation.get_item_printable_name(food, pricetag=True)
     return create_user_row(food, selection_callback, register_dynamic_font_callback,
                            image_height,
-                           display_string=display_string)
+                           display_string=display_string, atlas=atlas, decode_missing=decode_missing)
+
+
+def update_row_image(row, atlas, size):
+    """
+    Sets image of row created by `create_user_row` or `create_food_row` to thumbnail from atlas. Photo not contained
+    in atlas is decoded.
+
+    :param row: Gtk.ListBoxRow
+    :param atlas: thumbnail_atlas.ThumbnailAtlas (or None)
+    :param size: width and height of image
+    """
+
+    if not load_image_from_atlas(row.image, atlas, row.user, size):
+        load_image_from_file(row.image, row.user.photo, size, size)
+
+
+def change_row_text(row, new_text):
+    """
+    Changes text of row created by `create_user_row` or `create_food_row`.
+
+    :param row: Gtk.ListBoxRow
+    :param new_text: string representing new text
+    """
+
+    change_label_entry_text(row.label, new_text)
+
+
+def run_in_main_loop(function, *args):
+    """
+    Schedules function to be called once from Gtk main loop. Can be called from any thread.
+
+    :param function: function to call
+    :param args: arguments of function
+    """
+
+    def run_once():
+        function(*args)
+        return False
+
+    GLib.idle_add(run_once)
 
 
 def set_listbox_filter(listbox, filter_function):
@@ -74,6 +127,37 @@ def set_listbox_filter(listbox, filter_function):
     listbox.set_filter_func(filter_function, None)
 
 
+def set_listbox_sort(listbox, sort_function):
+    """
+    Sets sort function of listbox.
+
+    :param listbox: listbox to be set
+    :param sort_function: function comparing two rows
+    """
+    listbox.set_sort_func(sort_function, None)
+
+
+def invalidate_listbox_sort(listbox):
+    """
+    Sorts rows of listbox again (for example when data used by sort function changed).
+
+    :param listbox: listbox to be sorted
+    """
+    if listbox is not None:
+        listbox.invalidate_sort()
+
+
+def invalidate_listbox_filter(listbox):
+    """
+    Filters rows of listbox again (for example when data used by filter function changed).
+
+    :param listbox: listbox to be filtered
+    """
+    if listbox is not None:
+        listbox.invalidate_filter()
+
+
+@instrument
 def load_image_from_file(image, path, width, height):
     """
     Loads file to image (if file exists).
@@ -98,6 +182,58 @@ def load_image_from_file(image, path, width, height):
     return success
 
 
+def load_pixbuf_from_file(path, width, height):
+    """
+    Loads file to scaled pixbuf. Doesn't touch widgets, so it can be called from any thread.
+
+    :param path: path to image file
+    :param width: target width of image
+    :param height: target height of image
+    :return: GdkPixbuf.Pixbuf, or None if file can't be loaded
+    """
+
+    if path is None:
+        return None
+    try:
+        return GdkPixbuf.Pixbuf.new_from_file_at_scale(path, int(width), int(height), False)
+    except GObject.GError:
+        return None
+
+
+def set_image_pixbuf(image, pixbuf):
+    """
+    Sets pixbuf to image, or stock gtk-missing-image if pixbuf is None.
+
+    :param image: Gtk.Image
+    :param pixbuf: GdkPixbuf.Pixbuf or None
+    """
+
+    if pixbuf is None:
+        image_set_missing(image)
+    else:
+        image.set_from_pixbuf(pixbuf)
+
+
+def load_image_from_atlas(image, atlas, obj, size):
+    """
+    Sets image to thumbnail of user or item from atlas. Pixels stay in mapped atlas file, they are not copied.
+
+    :param image: Gtk.Image
+    :param atlas: thumbnail_atlas.ThumbnailAtlas (or None)
+    :param obj: user or item
+    :param size: required width and height of image
+    :return: True if successful, False otherwise
+    """
+
+    if atlas is None or image is None or atlas.size != size:
+        return False
+    pixbuf = atlas.get_pixbuf(obj)
+    if pixbuf is None:
+        return False
+    image.set_from_pixbuf(pixbuf)
+    return True
+
+
 def image_set_missing(image):
     """
     Set stock gtk-missing-image to image.
@@ -128,6 +264,17 @@ def change_label_entry_text(label, new_text):
     label.set_text(new_text)
 
 
+def change_text_view_text(text_view, new_text):
+    """
+    Changes text of text view.
+
+    :param text_view: Gtk.TextView
+    :param new_text: string representing new text
+    """
+
+    text_view.get_buffer().set_text(new_text)
+
+
 def change_button_text(button, new_text):
     """
     Changes text of button.
@@ -163,6 +310,29 @@ def get_text_from_button(button):
     return button.get_label()
 
 
+def get_key_event_char(event):
+    """
+    Gets character typed in key press event.
+
+    :param event: Gdk.EventKey
+    :return: typed character, "\\n" for Enter, None if key doesn't represent character
+    """
+
+    if event.keyval in (Gdk.KEY_Return, Gdk.KEY_KP_Enter):
+        return "\n"
+    code = Gdk.keyval_to_unicode(event.keyval)
+    return chr(code) if code != 0 else None
+
+
+def get_key_event_time(event):
+    """
+    :param event: Gdk.EventKey
+    :return: time of event in milliseconds
+    """
+
+    return event.time
+
+
 def get_text_from_entry(entry):
     return entry.get_text()
 
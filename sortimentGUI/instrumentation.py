@@ -0,0 +1,194 @@
+import atexit
+import functools
+import os
+import threading
+import time
+
+# Instrumentation is opt-in, set SORTIMENT_INSTRUMENT=1 to enable it.
+enabled = os.environ.get("SORTIMENT_INSTRUMENT", "") not in ("", "0")
+default_output_path = os.environ.get("SORTIMENT_INSTRUMENT_FILE",
+                                     os.path.join(os.path.expanduser("~"), ".cache", "sortiment", "stats.txt"))
+# upper bounds of histogram buckets in milliseconds
+bucket_bounds = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+
+_stats = dict()
+_lock = threading.Lock()
+
+
+class Stats:
+    """
+    Call count and latency histogram of one instrumented function.
+    """
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(bucket_bounds)
+
+    def record(self, duration):
+        """
+        Records one call.
+
+        :param duration: duration of call in seconds
+        """
+
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        ms = duration * 1000
+        for i, bound in enumerate(bucket_bounds):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+
+
+def record(name, duration):
+    """
+    Records duration of one call of named function.
+
+    :param name: name used in statistics
+    :param duration: duration of call in seconds
+    """
+
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = Stats()
+        stats.record(duration)
+
+
+def get_stats():
+    """
+    :return: copy of dictionary mapping names to `Stats`
+    """
+
+    with _lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+
+
+def instrument(function=None, name=None):
+    """
+    Decorator recording call count and latency of function. If instrumentation is disabled, function is returned
+    unchanged, so there is no overhead.
+
+    :param function: function to decorate
+    :param name: name used in statistics (function qualified name by default)
+    :return: decorated function
+    """
+
+    if function is None:
+        return functools.partial(instrument, name=name)
+    if not enabled:
+        return function
+    if name is None:
+        name = function.__qualname__
+
+    @functools.wraps(function)
+    def inner(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(name, time.perf_counter() - start)
+
+    return inner
+
+
+class InstrumentedDatabase:
+    """
+    Wraps database and records duration of every method call as "database.<method>".
+    """
+
+    def __init__(self, database):
+        self._database = database
+
+    def __getattr__(self, item):
+        attr = getattr(self._database, item)
+        if not callable(attr):
+            return attr
+        return instrument(attr, name="database." + item)
+
+
+def wrap_database(database):
+    """
+    Wraps database to record timings of its calls if instrumentation is enabled.
+
+    :param database: database object
+    :return: wrapped database, or database itself if instrumentation is disabled
+    """
+
+    if not enabled:
+        return database
+    return InstrumentedDatabase(database)
+
+
+def start_main_loop_monitor(interval=100):
+    """
+    Starts periodic main loop callback measuring how late it was called. Delays longer than interval are recorded
+    as "main_loop.stall".
+
+    :param interval: interval of callback in milliseconds
+    """
+
+    from gi.repository import GLib
+
+    last = [time.perf_counter()]
+
+    def tick():
+        now = time.perf_counter()
+        delay = now - last[0] - interval / 1000
+        if delay > interval / 1000:
+            record("main_loop.stall", delay)
+        last[0] = now
+        return True
+
+    GLib.timeout_add(interval, tick)
+
+
+def format_stats():
+    """
+    :return: human readable table of all recorded statistics
+    """
+
+    header = ["name", "count", "avg ms", "max ms"] + ["<=" + str(b) for b in bucket_bounds[:-1]] + [">" + str(
+        bucket_bounds[-2])]
+    lines = ["\t".join(header)]
+    for name, stats in sorted(get_stats().items()):
+        avg = stats.total / stats.count * 1000 if stats.count else 0
+        lines.append("\t".join([name, str(stats.count), "{:.3f}".format(avg), "{:.3f}".format(stats.max * 1000)] +
+                               [str(b) for b in stats.buckets]))
+    return "\n".join(lines) + "\n"
+
+
+def dump_stats(path=None):
+    """
+    Writes statistics to file.
+
+    :param path: output file (or None for default)
+    """
+
+    if path is None:
+        path = default_output_path
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(format_stats())
+
+
+def start():
+    """
+    Starts main loop monitor and registers dumping statistics on exit, if instrumentation is enabled.
+    Should be called before Gtk.main().
+    """
+
+    if not enabled:
+        return
+    start_main_loop_monitor()
+    atexit.register(dump_stats)
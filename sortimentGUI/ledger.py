@@ -0,0 +1,180 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from . import data_manipulation
+from . import snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def get_ledger_path(ledger_dir=None):
+    """
+    :param ledger_dir: directory containing ledger (or None for default)
+    :return: path to ledger journal
+    """
+
+    if ledger_dir is None:
+        ledger_dir = snapshot.default_snapshot_dir
+    return os.path.join(ledger_dir, "ledger.jsonl")
+
+
+class Ledger:
+    """
+    Local record of money transfers. Transfer is written to journal when it's made and submitted to database later
+    in one batch with other transfers made meanwhile, so till doesn't wait for backend round trip. Transfers not
+    confirmed by database are submitted again (also after restart). Every transfer has unique id, so database can
+    ignore transfer submitted twice.
+
+    Journal contains one JSON object per line, either transfer ``{"id", "time", "from", "to", "amount"}`` (None in
+    "from" or "to" means cash) or confirmation ``{"submitted": [ids]}``. After every confirmed batch journal is
+    rewritten to contain only pending transfers, so it doesn't grow.
+
+    Balances read from database may or may not include batch which is being submitted. Balances read by
+    `read_consistent` are read while no batch is submitted, balances received in change notifications include
+    batch as soon as it's applied, so in both cases `get_pending_balance_changes` gives exactly the transfers
+    missing in them.
+    """
+
+    def __init__(self, database, path=None, batch_delay=1.0, retry_delay=10.0):
+        """
+        :param database: database with `transfer_money` method
+        :param path: path to journal (or None for default)
+        :param batch_delay: time in seconds to wait for more transfers before submitting batch
+        :param retry_delay: delay in seconds before submitting batch again after failure
+        """
+
+        self.database = database
+        self.path = get_ledger_path() if path is None else path
+        self.batch_delay = batch_delay
+        self.retry_delay = retry_delay
+        self.pending = list()  # transfers not confirmed by database
+        self.submitting = set()  # ids of transfers being submitted
+        self.condition = threading.Condition()
+        self.journal_lock = threading.Lock()
+        self.submit_lock = threading.Lock()  # held while batch is being submitted
+        self.load()
+        threading.Thread(target=self.submit_loop, name="ledger", daemon=True).start()
+
+    def load(self):
+        transfers = list()
+        submitted = set()
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # line was not completely written
+                    if "submitted" in entry:
+                        submitted.update(entry["submitted"])
+                    else:
+                        transfers.append(entry)
+        except OSError:
+            return
+        self.pending = [transfer for transfer in transfers if transfer["id"] not in submitted]
+
+    def append_journal(self, entry):
+        with self.journal_lock:
+            self.append_journal_locked(entry)
+
+    def append_journal_locked(self, entry):
+        """
+        Appends entry to journal. Journal lock must be held by caller.
+        """
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.warning("Can't write ledger %s: %s", self.path, e)
+
+    def compact_journal(self, submitted):
+        """
+        Rewrites journal with pending transfers only. If it fails, confirmation is appended instead.
+
+        :param submitted: set of ids of confirmed transfers
+        """
+
+        with self.journal_lock:
+            with self.condition:
+                data = "".join(json.dumps(transfer, separators=(",", ":")) + "\n" for transfer in self.pending)
+            if snapshot.write_atomic(self.path, data.encode()):
+                return
+        self.append_journal({"submitted": sorted(submitted)})
+
+    def record(self, from_user_id, to_user_id, amount):
+        """
+        Records transfer and schedules its submission.
+
+        :param from_user_id: id of user paying money, or None for cash
+        :param to_user_id: id of user receiving money, or None for cash
+        :param amount: amount in cents
+        :return: transfer (dictionary)
+        """
+
+        transfer = {"id": uuid.uuid4().hex, "time": time.time(), "from": from_user_id, "to": to_user_id,
+                    "amount": amount}
+        with self.journal_lock:
+            self.append_journal_locked(transfer)
+            with self.condition:
+                self.pending.append(transfer)
+                self.condition.notify()
+        return transfer
+
+    def pending_count(self):
+        with self.condition:
+            return len(self.pending)
+
+    def get_pending_balance_changes(self):
+        """
+        :return: dictionary user id -> change of balance caused by transfers not submitted to database yet (transfers
+            being submitted are left out)
+        """
+
+        with self.condition:
+            return data_manipulation.transfer_totals(transfer for transfer in self.pending
+                                                     if transfer["id"] not in self.submitting)
+
+    def read_consistent(self, read):
+        """
+        Reads data from database while no batch is submitted, so every transfer is either included in data or in
+        returned changes.
+
+        :param read: function reading from database, for example `database.get_user`
+        :return: (result of read, result of `get_pending_balance_changes`)
+        """
+
+        with self.submit_lock:
+            return read(), self.get_pending_balance_changes()
+
+    def submit_loop(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+            time.sleep(self.batch_delay)
+            with self.submit_lock:
+                with self.condition:
+                    batch = list(self.pending)
+                    ids = self.submitting = {transfer["id"] for transfer in batch}
+                try:
+                    self.database.transfer_money([(transfer["id"], transfer["from"], transfer["to"],
+                                                   transfer["amount"]) for transfer in batch])
+                except Exception as e:
+                    logger.warning("Submitting %d transfers failed: %s", len(batch), e)
+                    ids = None
+                with self.condition:
+                    if ids is not None:
+                        self.pending = [transfer for transfer in self.pending if transfer["id"] not in ids]
+                    self.submitting = set()
+            if ids is None:
+                time.sleep(self.retry_delay)
+                continue
+            self.compact_journal(ids)
@@ -0,0 +1,178 @@
+import heapq
+import math
+import pickle
+import threading
+import time
+
+from . import snapshot
+
+default_half_life = 14 * 24 * 3600  # purchases lose half of weight after two weeks
+default_reference_time = 1577836800  # 2020-01-01, scores are stored relative to this time
+max_exponent = 300  # when weight of new event exceeds 2^max_exponent, scores are rebased to avoid overflow
+
+
+class DecayClock:
+    """
+    Exponential time decay shared by time decayed counters. Event of amount a at time t adds
+    a * 2^((t - reference_time) / half_life) to score. Score decayed to any time is stored score multiplied by the
+    same factor for all keys, so stored scores can be compared directly and nothing has to be recomputed when time
+    passes. When weights grow too large, all scores are rebased to newer reference time.
+    """
+
+    def __init__(self, half_life, reference_time=default_reference_time):
+        """
+        :param half_life: half life of event weight in seconds
+        :param reference_time: time whose events have weight 1
+        """
+
+        self.half_life = half_life
+        self.reference_time = reference_time
+
+    def exponent(self, timestamp):
+        return (timestamp - self.reference_time) / self.half_life
+
+    def rebase(self, timestamp, score_dicts):
+        """
+        Divides all scores by weight of timestamp and makes timestamp new reference time.
+
+        :param timestamp: new reference time
+        :param score_dicts: iterable of dictionaries key -> score, modified in place
+        """
+
+        factor = math.pow(2, -self.exponent(timestamp))
+        for scores in score_dicts:
+            for key in scores:
+                scores[key] *= factor
+        self.reference_time = timestamp
+
+    def weight(self, amount, timestamp, score_dicts):
+        """
+        Computes score added by event. Scores are rebased first if weight of timestamp would be too large.
+
+        :param amount: amount of event
+        :param timestamp: time of event
+        :param score_dicts: function returning all dictionaries with scores, called only if rebase is needed
+        :return: score of event
+        """
+
+        if self.exponent(timestamp) > max_exponent:
+            self.rebase(timestamp, score_dicts())
+        return amount * math.pow(2, self.exponent(timestamp))
+
+    def decayed(self, score, timestamp):
+        """
+        :param score: stored score
+        :param timestamp: time
+        :return: score decayed to timestamp
+        """
+
+        return score * math.pow(2, -self.exponent(timestamp))
+
+
+class UsageRanking:
+    """
+    Time decayed purchase counts of users and of user-item pairs, see `DecayClock`.
+    """
+
+    def __init__(self, half_life=default_half_life):
+        self.clock = DecayClock(half_life)
+        self.user_scores = dict()  # user id -> score
+        self.item_scores = dict()  # item id -> score
+        self.pair_scores = dict()  # user id -> dict(item id -> score)
+        self.lock = threading.Lock()
+
+    def score_dicts(self):
+        return [self.user_scores, self.item_scores] + list(self.pair_scores.values())
+
+    def record(self, user_id, item_id, amount=1, timestamp=None):
+        """
+        Records purchase.
+
+        :param user_id: id of user
+        :param item_id: id of item (or None if no item was bought, for example deposit)
+        :param amount: number of items bought (every purchase counts at least as one item, so deposit counts too)
+        :param timestamp: time of purchase (or None for now)
+        """
+
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            score = self.clock.weight(max(amount, 1), timestamp, self.score_dicts)
+            self.user_scores[user_id] = self.user_scores.get(user_id, 0) + score
+            if item_id is not None:
+                self.item_scores[item_id] = self.item_scores.get(item_id, 0) + score
+                items = self.pair_scores.setdefault(user_id, dict())
+                items[item_id] = items.get(item_id, 0) + score
+
+    def user_score(self, user_id):
+        return self.user_scores.get(user_id, 0)
+
+    def item_score(self, item_id, user_id=None):
+        """
+        :param item_id: id of item
+        :param user_id: id of selected user (or None)
+        :return: tuple comparable between items, score of pair first, global score of item second
+        """
+
+        pair = self.pair_scores.get(user_id)
+        return (pair.get(item_id, 0) if pair is not None else 0), self.item_scores.get(item_id, 0)
+
+    def top_items(self, user_id, count):
+        """
+        Gets items most likely bought by user.
+
+        :param user_id: id of user
+        :param count: maximal number of items
+        :return: list of item ids, most likely first
+        """
+
+        with self.lock:
+            pair = self.pair_scores.get(user_id)
+            if pair is None:
+                return list()
+            return [item_id for item_id, _ in heapq.nlargest(count, pair.items(), key=lambda x: x[1])]
+
+    def decayed(self, score, timestamp=None):
+        """
+        Converts stored score to decayed purchase count at given time.
+
+        :param score: stored score
+        :param timestamp: time (or None for now)
+        :return: decayed count
+        """
+
+        return self.clock.decayed(score, time.time() if timestamp is None else timestamp)
+
+    def save(self, snapshot_dir=None):
+        with self.lock:
+            data = pickle.dumps((self.clock.half_life, self.clock.reference_time, self.user_scores,
+                                 self.item_scores, self.pair_scores), protocol=pickle.HIGHEST_PROTOCOL)
+        return snapshot.write_atomic(snapshot.get_snapshot_path("ranking", snapshot_dir), data)
+
+
+def load_ranking(snapshot_dir=None):
+    """
+    Loads ranking saved by `UsageRanking.save`.
+
+    :param snapshot_dir: directory containing snapshots (or None for default)
+    :return: loaded ranking, or empty ranking if it wasn't saved yet
+    """
+
+    ranking = UsageRanking()
+    try:
+        with open(snapshot.get_snapshot_path("ranking", snapshot_dir), "rb") as f:
+            half_life, reference_time, ranking.user_scores, ranking.item_scores, ranking.pair_scores = pickle.load(f)
+        ranking.clock = DecayClock(half_life, reference_time)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        return UsageRanking()
+    return ranking
+
+
+def compare(a, b):
+    """
+    Comparison function for sorting by descending score.
+
+    :return: negative number if a should be before b, positive if after, 0 if equal
+    """
+
+    return (a < b) - (a > b)
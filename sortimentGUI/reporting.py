@@ -0,0 +1,227 @@
+"""
+Statistics computed from transaction history. History is loaded into column arrays (user id, item id, amount, price,
+time) and aggregated by vectorized group-by operations, so years of history are processed in well under a second.
+NumPy is optional, without it the same results are computed by plain Python (slower).
+
+Transaction ``(user_id, item_id, amount, price, time)`` changes balance of user by ``-amount * price``. Money
+transfers are transactions without item (item_id is None).
+"""
+
+import collections
+import datetime
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+day_seconds = 86400
+hour_seconds = 3600
+
+
+def get_local_offset(hour):
+    """
+    :param hour: hours since epoch
+    :return: offset of local time in seconds valid at start of hour (offsets change only at whole hours)
+    """
+
+    return time.localtime(hour * hour_seconds).tm_gmtoff
+
+
+class TransactionHistory:
+    """
+    Transaction history stored by columns (NumPy arrays if NumPy is available, lists otherwise). Missing item id is
+    stored as -1.
+    """
+
+    def __init__(self, transactions, utc_offset=None):
+        """
+        :param transactions: iterable of (user_id, item_id, amount, price, time)
+        :param utc_offset: fixed offset of local time in seconds used to split days (or None to use local offset valid
+            at time of every transaction)
+        """
+
+        self.utc_offset = utc_offset
+        columns = list(zip(*transactions)) or [(), (), (), (), ()]
+        user_ids, item_ids, amounts, prices, times = columns
+        item_ids = [-1 if item_id is None else item_id for item_id in item_ids]
+        if numpy is not None:
+            self.user_ids = numpy.array(user_ids, dtype=numpy.int64)
+            self.item_ids = numpy.array(item_ids, dtype=numpy.int64)
+            self.amounts = numpy.array(amounts, dtype=numpy.int64)
+            self.prices = numpy.array(prices, dtype=numpy.int64)
+            self.times = numpy.array(times, dtype=numpy.float64)
+        else:
+            self.user_ids = list(user_ids)
+            self.item_ids = item_ids
+            self.amounts = list(amounts)
+            self.prices = list(prices)
+            self.times = list(times)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def costs(self):
+        """
+        :return: amount * price of every transaction
+        """
+
+        if numpy is not None:
+            return self.amounts * self.prices
+        return [amount * price for amount, price in zip(self.amounts, self.prices)]
+
+    def days(self):
+        """
+        :return: local day number (days since epoch) of every transaction
+        """
+
+        if numpy is not None:
+            offsets = self.utc_offset
+            if offsets is None:
+                # local offset is looked up once for every distinct hour
+                hours, inverse = numpy.unique(numpy.floor_divide(self.times, hour_seconds).astype(numpy.int64),
+                                              return_inverse=True)
+                offsets = numpy.array([get_local_offset(hour) for hour in hours.tolist()], dtype=numpy.float64)
+                offsets = offsets[inverse]
+            return numpy.floor_divide(self.times + offsets, day_seconds).astype(numpy.int64)
+        if self.utc_offset is not None:
+            return [int((t + self.utc_offset) // day_seconds) for t in self.times]
+        cache = dict()  # hour -> offset
+        days = list()
+        for t in self.times:
+            hour = int(t // hour_seconds)
+            offset = cache.get(hour)
+            if offset is None:
+                offset = cache[hour] = get_local_offset(hour)
+            days.append(int((t + offset) // day_seconds))
+        return days
+
+
+def group_sum(keys, values):
+    """
+    Sums values by keys.
+
+    :param keys: sequence of int keys
+    :param values: sequence of int values
+    :return: (list of distinct keys in ascending order, list of respective sums)
+    """
+
+    if numpy is not None and len(keys) > 0:
+        unique, inverse = numpy.unique(keys, return_inverse=True)
+        # float64 sums of cents are exact below 2 ** 53
+        sums = numpy.bincount(inverse, weights=values, minlength=len(unique))
+        return unique.tolist(), numpy.rint(sums).astype(numpy.int64).tolist()
+    sums = collections.Counter()
+    for key, value in zip(keys, values):
+        sums[key] += value
+    unique = sorted(sums)
+    return unique, [sums[key] for key in unique]
+
+
+def balance_changes(history):
+    """
+    :param history: TransactionHistory
+    :return: dictionary user id -> change of balance caused by history
+    """
+
+    costs = history.costs()
+    user_ids, sums = group_sum(history.user_ids, costs)
+    return {user_id: -total for user_id, total in zip(user_ids, sums)}
+
+
+def item_sales(history):
+    """
+    :param history: TransactionHistory
+    :return: list of (item id, sold amount, revenue), best selling first
+    """
+
+    if numpy is not None:
+        mask = history.item_ids >= 0
+        item_ids = history.item_ids[mask]
+        amounts = history.amounts[mask]
+        costs = history.costs()[mask]
+    else:
+        mask = [item_id >= 0 for item_id in history.item_ids]
+        item_ids = [item_id for item_id, m in zip(history.item_ids, mask) if m]
+        amounts = [amount for amount, m in zip(history.amounts, mask) if m]
+        costs = [cost for cost, m in zip(history.costs(), mask) if m]
+    ids, sold = group_sum(item_ids, amounts)
+    _, revenue = group_sum(item_ids, costs)
+    return sorted(zip(ids, sold, revenue), key=lambda x: (-x[1], x[0]))
+
+
+def daily_totals(history):
+    """
+    :param history: TransactionHistory
+    :return: list of (datetime.date, revenue from items sold that day), oldest first
+    """
+
+    if numpy is not None:
+        mask = history.item_ids >= 0
+        days = history.days()[mask]
+        costs = history.costs()[mask]
+    else:
+        mask = [item_id >= 0 for item_id in history.item_ids]
+        days = [day for day, m in zip(history.days(), mask) if m]
+        costs = [cost for cost, m in zip(history.costs(), mask) if m]
+    epoch = datetime.date(1970, 1, 1)
+    day_numbers, totals = group_sum(days, costs)
+    return [(epoch + datetime.timedelta(days=day), total) for day, total in zip(day_numbers, totals)]
+
+
+def debtors(users, limit=None):
+    """
+    :param users: list of users
+    :param limit: maximal number of returned users (or None for all)
+    :return: users with negative balance, largest debt first
+    """
+
+    users = [user for user in users if user.balance is not None]
+    if numpy is not None and users:
+        balances = numpy.fromiter((user.balance for user in users), dtype=numpy.int64, count=len(users))
+        indexes = numpy.flatnonzero(balances < 0)
+        indexes = indexes[numpy.argsort(balances[indexes], kind="stable")]
+        result = [users[i] for i in indexes.tolist()]
+    else:
+        result = sorted((user for user in users if user.balance < 0), key=lambda user: user.balance)
+    return result if limit is None else result[:limit]
+
+
+def create_report(history, users, items, limit=20, format_money=str, low_stock=None):
+    """
+    Creates text report.
+
+    :param history: TransactionHistory
+    :param users: list of users
+    :param items: list of items
+    :param limit: number of rows of every table
+    :param format_money: function formatting amount in cents
+    :param low_stock: result of `forecast.ConsumptionForecast.low_stock` (or None to omit)
+    :return: report as string
+    """
+
+    item_names = {item.id: item.name for item in items}
+    user_names = {user.id: user.nick if user.nick is not None else user.name for user in users}
+    lines = ["Transactions: " + str(len(history)), ""]
+    if low_stock is not None:
+        lines.append("Running out:")
+        for item_id, remaining, rate, days_left in low_stock[:limit]:
+            lines.append("  " + str(item_names.get(item_id, item_id)) + ": " + str(remaining) + " pcs left, " +
+                         "{:.1f} pcs/day, {:.1f} days".format(rate, days_left))
+        lines.append("")
+    lines.append("Debtors:")
+    for user in debtors(users, limit):
+        lines.append("  " + str(user_names.get(user.id)) + ": " + format_money(user.balance))
+    lines += ["", "Balance changes:"]
+    changes = sorted(balance_changes(history).items(), key=lambda x: (-abs(x[1]), x[0]))
+    for user_id, change in changes[:limit]:
+        lines.append("  " + str(user_names.get(user_id, user_id)) + ": " + format_money(change))
+    lines += ["", "Best selling items:"]
+    for item_id, sold, revenue in item_sales(history)[:limit]:
+        lines.append("  " + str(item_names.get(item_id, item_id)) + ": " + str(sold) + " pcs, " +
+                     format_money(revenue))
+    lines += ["", "Daily totals:"]
+    for day, total in daily_totals(history)[-limit:]:
+        lines.append("  " + day.isoformat() + ": " + format_money(total))
+    return "\n".join(lines)
@@ -0,0 +1,147 @@
+import itertools
+import threading
+from collections import Counter
+
+from . import data_manipulation
+
+
+candidate_factor = 4  # fuzzy search scores limit * candidate_factor names sharing most trigrams with query
+
+
+def trigrams(name):
+    """
+    :param name: normalized name
+    :return: set of trigrams of name padded with spaces
+    """
+
+    padded = "  " + name + " "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Index of normalized names of users or items. Names are normalized only once when objects are added and set of
+    objects matching filter is computed once per filter, so filter function of listbox is just set lookup.
+
+    Index also contains trigrams of names for fuzzy search tolerant to typos.
+
+    Objects are indexed by their database id, so object added again (for example after edit) replaces previous one.
+    """
+
+    def __init__(self):
+        self.names = dict()  # object id -> tuple of normalized names
+        self.objects = dict()  # object id -> object
+        self.cache = dict()  # regex pattern -> set of matching ids
+        self.postings = dict()  # trigram -> set of numbers of names containing trigram
+        self.name_owners = dict()  # number of name -> object id
+        self.name_numbers = dict()  # object id -> list of numbers of its names
+        self.name_trigrams = dict()  # number of name -> set of trigrams of name
+        self.next_number = itertools.count()
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.names.clear()
+            self.objects.clear()
+            self.cache.clear()
+            self.postings.clear()
+            self.name_owners.clear()
+            self.name_numbers.clear()
+            self.name_trigrams.clear()
+
+    def remove_names(self, key):
+        """
+        Removes names of object from trigram index. Lock must be held by caller.
+
+        :param key: object id
+        """
+
+        for number in self.name_numbers.pop(key, ()):
+            del self.name_owners[number]
+            for gram in self.name_trigrams.pop(number):
+                numbers = self.postings[gram]
+                numbers.discard(number)
+                if not numbers:
+                    del self.postings[gram]
+
+    def add(self, objects):
+        """
+        Adds objects to index.
+
+        :param objects: iterable of users or items
+        """
+
+        entries = [(obj.id, obj, tuple(data_manipulation.normalize_string(name)
+                                       for name in data_manipulation.get_search_keys(obj)))
+                   for obj in objects]
+        with self.lock:
+            for key, obj, names in entries:
+                self.remove_names(key)  # object added again replaces its previous names
+                self.objects[key] = obj
+                self.names[key] = names
+                numbers = self.name_numbers[key] = list()
+                for name in names:
+                    grams = trigrams(name)
+                    number = next(self.next_number)
+                    numbers.append(number)
+                    self.name_owners[number] = key
+                    self.name_trigrams[number] = grams
+                    for gram in grams:
+                        self.postings.setdefault(gram, set()).add(number)
+            self.cache.clear()
+
+    def matching(self, regex_obj):
+        """
+        :param regex_obj: compiled regex
+        :return: set of ids of objects having name matching regex
+        """
+
+        with self.lock:
+            result = self.cache.get(regex_obj.pattern)
+            if result is None:
+                search = regex_obj.search
+                result = {key for key, names in self.names.items()
+                          if any(search(name) is not None for name in names)}
+                self.cache[regex_obj.pattern] = result
+            return result
+
+    def matches(self, obj, regex_obj):
+        """
+        Checks if object matches filter. Objects not present in index are matched directly.
+
+        :param obj: user or item
+        :param regex_obj: compiled regex or None
+        :return: True if object should be displayed, False otherwise
+        """
+
+        if regex_obj is None:
+            return True
+        key = obj.id
+        if key not in self.names or self.objects[key] is not obj:
+            return data_manipulation.matches_filter(obj, regex_obj)
+        return key in self.matching(regex_obj)
+
+    def fuzzy_search(self, query, limit=50, min_similarity=0.2):
+        """
+        Finds objects with names similar to query. Similarity of name is Jaccard similarity of trigrams of name and
+        query, so names with typos are found too.
+
+        :param query: searched text (it is normalized)
+        :param limit: maximal number of results
+        :param min_similarity: minimal similarity of result (0 to 1)
+        :return: list of (object id, similarity) pairs, most similar first
+        """
+
+        query_grams = trigrams(data_manipulation.normalize_string(query))
+        shared = Counter()
+        with self.lock:
+            for gram in query_grams:
+                shared.update(self.postings.get(gram, ()))
+            # names sharing most trigrams with query are candidates, only they are scored exactly
+            best = dict()
+            for number, count in shared.most_common(limit * candidate_factor):
+                key = self.name_owners[number]
+                similarity = count / (len(query_grams) + len(self.name_trigrams[number]) - count)
+                if similarity >= min_similarity and similarity > best.get(key, 0):
+                    best[key] = similarity
+        return sorted(best.items(), key=lambda x: x[1], reverse=True)[:limit]
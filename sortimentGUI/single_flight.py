@@ -0,0 +1,142 @@
+import copy
+import inspect
+import threading
+
+
+class _Call:
+    __slots__ = ("event", "result", "exception", "waiters", "copies")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exception = None
+        self.waiters = 0  # number of callers which joined call
+        self.copies = list()  # copies of result for callers which joined call
+
+
+class SingleFlight:
+    """
+    Runs function only once for concurrent calls with the same key. Callers arriving while call is in flight wait
+    for it and get its result (or exception). If `copy_result` is given, every caller which joined gets its own copy
+    made before result is returned to first caller, so callers can modify results independently.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = dict()  # key -> _Call
+
+    def do(self, key, function, copy_result=None):
+        """
+        :param key: hashable key identifying call
+        :param function: function without arguments
+        :param copy_result: function copying result for callers which joined (or None to share result)
+        :return: result of function
+        """
+
+        with self.lock:
+            call = self.in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self.in_flight[key] = _Call()
+            else:
+                call.waiters += 1
+        if not leader:
+            call.event.wait()
+            if call.exception is None and copy_result is not None:
+                with self.lock:
+                    return call.copies.pop()
+        else:
+            try:
+                call.result = function()
+            except Exception as e:
+                call.exception = e
+            finally:
+                with self.lock:
+                    del self.in_flight[key]
+                try:
+                    if call.exception is None and copy_result is not None:
+                        call.copies = [copy_result(call.result) for _ in range(call.waiters)]
+                except Exception as e:
+                    call.exception = e
+                call.event.set()
+        if call.exception is not None:
+            raise call.exception
+        return call.result
+
+
+class SingleFlightDatabase:
+    """
+    Wraps database so concurrent identical reads share one request. Every caller gets its own deep copy of result.
+    Reads started after write don't join reads started before it, so they always see result of the write.
+    """
+
+    read_methods = ("get_user", "get_item", "get_transactions")
+    write_methods = ("buy_items", "transfer_money", "add_user", "edit_user", "add_item", "edit_item", "import_objects")
+
+    def __init__(self, database):
+        self._database = database
+        self._flight = SingleFlight()
+        self._generation = 0  # incremented before and after every write
+        self._generation_lock = threading.Lock()
+        self._signatures = dict()  # name of read method -> its signature
+
+    def _get_read_key(self, item, method, args, kwargs):
+        """
+        :return: key identifying read, calls which differ only in how arguments are passed (positionally, by keyword
+            or omitted with default value) have the same key
+        :raise TypeError: if arguments don't match method
+        """
+
+        signature = self._signatures.get(item)
+        if signature is None:
+            signature = self._signatures[item] = inspect.signature(method)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return item, tuple(bound.arguments.items()), self._generation
+
+    def _next_generation(self):
+        with self._generation_lock:
+            self._generation += 1
+
+    def _wrap_call_async(self, call_async):
+        """
+        Wraps non-blocking call of database, so writes made by it are tracked same as blocking writes. Second
+        generation change happens when callback is called.
+        """
+
+        def inner(method, *args, callback=None, error_callback=None):
+            if method not in self.write_methods:
+                return call_async(method, *args, callback=callback, error_callback=error_callback)
+
+            def finish(function, value):
+                self._next_generation()
+                if function is not None:
+                    function(value)
+
+            self._next_generation()
+            return call_async(method, *args, callback=lambda result: finish(callback, result),
+                              error_callback=lambda exception: finish(error_callback, exception))
+
+        return inner
+
+    def __getattr__(self, item):
+        attr = getattr(self._database, item)
+        if item == "call_async":
+            return self._wrap_call_async(attr)
+        if not callable(attr) or item not in self.read_methods + self.write_methods:
+            return attr
+        if item in self.read_methods:
+            def read(*args, **kwargs):
+                key = self._get_read_key(item, attr, args, kwargs)  # get_user() joins get_user(None)
+                return self._flight.do(key, lambda: attr(*args, **kwargs), copy.deepcopy)
+
+            return read
+
+        def write(*args, **kwargs):
+            self._next_generation()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._next_generation()
+
+        return write
@@ -0,0 +1,84 @@
+import os
+import pickle
+import tempfile
+
+default_snapshot_dir = os.path.join(os.path.expanduser("~"), ".cache", "sortiment")
+
+
+def get_snapshot_path(kind, snapshot_dir=None):
+    """
+    Gets path of snapshot file for specific kind of data.
+
+    :param kind: name of data kind, for example "user" or "item"
+    :param snapshot_dir: directory containing snapshots (or None for default)
+    :return: path to snapshot file
+    """
+
+    if snapshot_dir is None:
+        snapshot_dir = default_snapshot_dir
+    return os.path.join(snapshot_dir, kind + ".snapshot")
+
+
+def write_atomic(path, data):
+    """
+    Writes data to temporary file first and then renames it, so file on disk is never half written.
+
+    :param path: path of file
+    :param data: bytes to write
+    :return: True if successful, False otherwise
+    """
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix="." + os.path.basename(path) + ".")
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def save_snapshot(kind, objects, snapshot_dir=None):
+    """
+    Saves list of users or items to disk, so it can be displayed immediately after next start.
+
+    :param kind: name of data kind, for example "user" or "item"
+    :param objects: list of objects returned from database
+    :param snapshot_dir: directory containing snapshots (or None for default)
+    :return: True if successful, False otherwise
+    """
+
+    try:
+        data = pickle.dumps(list(objects), protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return False
+    return write_atomic(get_snapshot_path(kind, snapshot_dir), data)
+
+
+def load_snapshot(kind, snapshot_dir=None):
+    """
+    Loads list of users or items saved by `save_snapshot`.
+
+    :param kind: name of data kind, for example "user" or "item"
+    :param snapshot_dir: directory containing snapshots (or None for default)
+    :return: list of objects, or None if snapshot does not exist or can't be read
+    """
+
+    try:
+        with open(get_snapshot_path(kind, snapshot_dir), "rb") as f:
+            objects = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError):
+        return None
+    if not isinstance(objects, list):
+        return None
+    return objects
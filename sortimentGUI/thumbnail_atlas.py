@@ -0,0 +1,254 @@
+"""
+Thumbnails of all users or items packed into one file of fixed-size RGB slots indexed by id. File is memory-mapped
+read-only and pixbufs are created directly over the mapping, so row images don't need separate allocations and pages
+are shared by all frontend processes using the same atlas.
+
+Layout: header (`header_struct`, padded to `header_size` bytes) followed by slots. Slot of object with id ``i`` starts
+at ``header_size + i * slot_size`` and contains key of photo path and state (`slot_struct`) followed by pixels.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+
+from gi.repository import GLib
+from gi.repository import GObject
+from gi.repository import GdkPixbuf
+
+from . import snapshot
+
+magic = b"SRTATLS1"
+header_struct = struct.Struct("<8sIIII")  # magic, size, rowstride, slot size, number of slots
+header_size = 64
+slot_struct = struct.Struct("<QQ")  # key of photo path, state
+slot_empty = 0
+slot_filled = 1
+slot_broken = 2  # photo can't be loaded
+max_slots = 1 << 20  # objects with greater id are not stored in atlas
+
+
+def get_atlas_path(kind, size, atlas_dir=None):
+    """
+    :param kind: name of data kind, for example "user" or "item"
+    :param size: width and height of thumbnails in pixels
+    :param atlas_dir: directory containing atlases (or None for default)
+    :return: path to atlas file
+    """
+
+    if atlas_dir is None:
+        atlas_dir = snapshot.default_snapshot_dir
+    return os.path.join(atlas_dir, kind + "-" + str(size) + ".atlas")
+
+
+def photo_key(path):
+    """
+    :param path: path to photo
+    :return: nonzero 64-bit key of path
+    """
+
+    key = int.from_bytes(hashlib.blake2b(path.encode(), digest_size=8).digest(), "little")
+    return key or 1
+
+
+def get_slot_index(obj):
+    """
+    :param obj: user or item
+    :return: index of slot of object, or None if object can't be stored in atlas
+    """
+
+    obj_id = getattr(obj, "id", None)
+    if not isinstance(obj_id, int) or not 0 <= obj_id < max_slots or not getattr(obj, "photo", None):
+        return None
+    return obj_id
+
+
+def render_thumbnail(path, size, rowstride):
+    """
+    Loads photo and scales it to RGB thumbnail.
+
+    :param path: path to photo
+    :param size: width and height of thumbnail in pixels
+    :param rowstride: length of row in bytes
+    :return: pixels (bytes), or None if photo can't be loaded
+    """
+
+    try:
+        source = GdkPixbuf.Pixbuf.new_from_file(path)
+    except GObject.GError:
+        return None
+    thumbnail = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB, False, 8, size, size)
+    source.scale(thumbnail, 0, 0, size, size, 0, 0, size / source.get_width(), size / source.get_height(),
+                 GdkPixbuf.InterpType.BILINEAR)
+    pixels = thumbnail.get_pixels()
+    stride = thumbnail.get_rowstride()
+    return b"".join(pixels[row * stride:row * stride + size * 3].ljust(rowstride, b"\0") for row in range(size))
+
+
+class ThumbnailAtlas:
+    """
+    Read-only view of atlas file.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: path to atlas file
+        :raise OSError: if file can't be opened
+        :raise ValueError: if file is not valid atlas
+        """
+
+        self.path = path
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            self.buffer = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            # second mapping of the same file for pixbufs, GLib.Bytes can't wrap Python buffer without copying
+            self.mapped_file = GLib.MappedFile.new_from_fd(fd, False)
+        finally:
+            os.close(fd)
+        if len(self.buffer) < header_size:
+            raise ValueError("Atlas " + path + " is truncated.")
+        file_magic, self.size, self.rowstride, self.slot_size, self.slot_count = header_struct.unpack_from(
+            self.buffer, 0)
+        if file_magic != magic or len(self.buffer) < header_size + self.slot_count * self.slot_size:
+            raise ValueError("Atlas " + path + " is not valid.")
+        self.bytes = self.mapped_file.get_bytes()
+
+    def get_slot(self, obj):
+        """
+        :param obj: user or item
+        :return: (state, offset of pixels), state is `slot_empty` if atlas doesn't contain current photo of object
+        """
+
+        index = get_slot_index(obj)
+        if index is None or index >= self.slot_count:
+            return slot_empty, None
+        offset = header_size + index * self.slot_size
+        key, state = slot_struct.unpack_from(self.buffer, offset)
+        if key != photo_key(obj.photo):
+            return slot_empty, None
+        return state, offset + slot_struct.size
+
+    def covers(self, objects):
+        """
+        :param objects: list of users or items
+        :return: True if atlas contains current photos of all objects
+        """
+
+        return all(get_slot_index(obj) is None or self.get_slot(obj)[0] != slot_empty for obj in objects)
+
+    def get_pixels(self, obj):
+        """
+        :param obj: user or item
+        :return: (state, pixels as bytes or None)
+        """
+
+        state, offset = self.get_slot(obj)
+        if state != slot_filled:
+            return state, None
+        return state, self.buffer[offset:offset + self.rowstride * self.size]
+
+    def get_pixbuf(self, obj):
+        """
+        Creates pixbuf over mapped pixels of object thumbnail (without copying them).
+
+        :param obj: user or item
+        :return: GdkPixbuf.Pixbuf, or None if atlas doesn't contain thumbnail of object
+        """
+
+        state, offset = self.get_slot(obj)
+        if state != slot_filled:
+            return None
+        data = GLib.Bytes.new_from_bytes(self.bytes, offset, self.rowstride * self.size)
+        return GdkPixbuf.Pixbuf.new_from_bytes(data, GdkPixbuf.Colorspace.RGB, False, 8, self.size, self.size,
+                                               self.rowstride)
+
+
+def open_atlas(path):
+    """
+    :param path: path to atlas file
+    :return: ThumbnailAtlas, or None if file doesn't exist or is not valid
+    """
+
+    try:
+        return ThumbnailAtlas(path)
+    except (OSError, ValueError, GObject.GError):
+        return None
+
+
+def build_atlas(path, objects, size, previous=None, get_thumbnail=None):
+    """
+    Writes atlas containing thumbnails of photos of objects. File is replaced atomically, so processes which have old
+    atlas mapped are not affected.
+
+    :param path: path to atlas file
+    :param objects: list of users or items
+    :param size: width and height of thumbnails in pixels
+    :param previous: ThumbnailAtlas whose thumbnails are reused if photo didn't change (or None)
+    :param get_thumbnail: function (path, size) returning path of small copy of photo shared by frontends, for
+        example `get_thumbnail` of cache daemon (or None to decode photos directly)
+    :return: True if successful, False otherwise
+    """
+
+    rowstride = (size * 3 + 3) & ~3
+    slot_size = (slot_struct.size + rowstride * size + 7) & ~7
+    indexes = [(get_slot_index(obj), obj) for obj in objects]
+    indexes = [(index, obj) for index, obj in indexes if index is not None]
+    slot_count = max((index for index, _ in indexes), default=-1) + 1
+    if previous is not None and (previous.size != size or previous.rowstride != rowstride):
+        previous = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix="." + os.path.basename(path) + ".")
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header_struct.pack(magic, size, rowstride, slot_size, slot_count).ljust(header_size, b"\0"))
+            f.truncate(header_size + slot_count * slot_size)  # empty slots stay sparse
+            for index, obj in indexes:
+                state, pixels = slot_empty, None
+                if previous is not None:
+                    state, pixels = previous.get_pixels(obj)
+                if state == slot_empty:
+                    source = obj.photo
+                    if get_thumbnail is not None:
+                        try:
+                            source = get_thumbnail(obj.photo, size)
+                        except Exception:
+                            get_thumbnail = None  # not supported by database, photos are decoded directly
+                    pixels = render_thumbnail(source, size, rowstride)
+                    state = slot_broken if pixels is None else slot_filled
+                f.seek(header_size + index * slot_size)
+                f.write(slot_struct.pack(photo_key(obj.photo), state))
+                if pixels is not None:
+                    f.write(pixels)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def update_atlas(kind, objects, size, atlas_dir=None, get_thumbnail=None):
+    """
+    Opens atlas of given kind and rebuilds it first if it doesn't contain current photos of all objects.
+
+    :param kind: name of data kind, for example "user" or "item"
+    :param objects: list of users or items
+    :param size: width and height of thumbnails in pixels
+    :param atlas_dir: directory containing atlases (or None for default)
+    :param get_thumbnail: function returning path of shared thumbnail, see `build_atlas` (or None)
+    :return: ThumbnailAtlas, or None if atlas can't be created
+    """
+
+    path = get_atlas_path(kind, size, atlas_dir)
+    atlas = open_atlas(path)
+    if atlas is not None and atlas.covers(objects):
+        return atlas
+    if not build_atlas(path, objects, size, atlas, get_thumbnail):
+        return atlas
+    return open_atlas(path)
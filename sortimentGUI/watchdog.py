@@ -0,0 +1,89 @@
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+# Stall threshold in seconds, set SORTIMENT_WATCHDOG_THRESHOLD=0 to disable watchdog.
+default_threshold = float(os.environ.get("SORTIMENT_WATCHDOG_THRESHOLD", "2"))
+
+
+class Watchdog:
+    """
+    Detects stalls of main loop. Main loop periodically updates heartbeat and separate thread checks it. When main
+    loop doesn't iterate for longer than threshold, stack of main thread is logged, so blocking handler can be found.
+    """
+
+    def __init__(self, threshold=default_threshold, heartbeat_interval=100, check_interval=0.25):
+        """
+        :param threshold: stall duration in seconds after which stack is logged
+        :param heartbeat_interval: interval of main loop heartbeat in milliseconds
+        :param check_interval: interval of checking heartbeat in seconds
+        """
+
+        self.threshold = threshold
+        self.heartbeat_interval = heartbeat_interval
+        self.check_interval = check_interval
+        self.last_beat = time.monotonic()
+        self.main_thread_id = None
+        self.stall_reported = False
+        self.running = False
+
+    def heartbeat(self):
+        """
+        Called from main loop.
+        """
+
+        now = time.monotonic()
+        if self.stall_reported:
+            logger.warning("Main loop resumed after %.2f s stall.", now - self.last_beat)
+            self.stall_reported = False
+        self.last_beat = now
+        return self.running
+
+    def check(self):
+        """
+        Checks heartbeat and logs stack of main thread if main loop is stalled.
+
+        :return: stack of main thread as string if new stall was detected, None otherwise
+        """
+
+        stall = time.monotonic() - self.last_beat
+        if stall <= self.threshold or self.stall_reported:
+            return None
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return None
+        stack = "".join(traceback.format_stack(frame))
+        self.stall_reported = True
+        logger.warning("Main loop stalled for %.2f s, main thread stack:\n%s", stall, stack)
+        return stack
+
+    def run(self):
+        while self.running:
+            time.sleep(self.check_interval)
+            self.check()
+
+    def start(self, main_thread_id=None):
+        """
+        Starts watchdog. Should be called from thread running main loop, before Gtk.main().
+
+        :param main_thread_id: ident of thread running main loop (current thread by default)
+        """
+
+        if self.threshold <= 0 or self.running:
+            return
+
+        from gi.repository import GLib
+
+        self.main_thread_id = threading.get_ident() if main_thread_id is None else main_thread_id
+        self.last_beat = time.monotonic()
+        self.running = True
+        GLib.timeout_add(self.heartbeat_interval, self.heartbeat)
+        threading.Thread(target=self.run, name="main-loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self.running = False
@@ -48,6 +48,20 @@ def create_window_profile(handler, show_all=True, fullscreen=True):
                          relative_filenames=True, fullscreen=fullscreen)
 
 
+def create_window_stats(handler, show_all=True, fullscreen=True):
+    """
+    Creates window displaying statistics computed from transaction history.
+
+    :param handler: Sortiment WindowHandler or None
+    :param show_all: True if window should be shown immediately
+    :param fullscreen: True if window should be in full screen mode by default
+    :return: new Window
+    """
+
+    return create_window("layouts/stats_window.glade", handler, show_all=show_all, should_quit=False,
+                         relative_filenames=True, fullscreen=fullscreen)
+
+
 def create_window_food(handler, show_all=True, fullscreen=True):
     """
     Creates window displaying info about food. It also contains button to navigate to transaction window.
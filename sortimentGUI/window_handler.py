@@ -1,13 +1,25 @@
 from math import ceil
 from time import sleep
 
-import os
+import copy
 import re
+import sys
+import threading
 from database import User, Item
+from . import config as sortiment_config
 from . import data_manipulation
+from . import error_handler
+from . import forecast
 from . import gtk_element_editor
+from . import ranking
+from . import snapshot
+from . import thumbnail_atlas
 from . import window_creator
+from .barcode import BarcodeReader
 from .decorators import use_threading, use_spinner
+from .instrumentation import instrument
+from .ledger import Ledger, get_ledger_path
+from .search_index import SearchIndex
 
 
 class WindowHandler:
@@ -46,6 +58,43 @@ class WindowHandler:
     edit_food_price_entry = None
     creating_new_user = True
     creating_new_food = True
+    snapshot_dir = None  # directory with snapshots of last fetched data (None for default)
+    user_list_generation = 0  # number of last started fetch of user_list, results of older fetches are discarded
+    food_list_generation = 0  # number of last started fetch of food_list, results of older fetches are discarded
+    usage_ranking = None  # ranking.UsageRanking used to order users and food
+    food_by_id = dict()  # food displayed in food_list by id
+    food_by_barcode = dict()  # food displayed in food_list by barcode
+    barcode_reader = BarcodeReader()
+    usual_items_box = None  # box containing buttons for buying items usually bought by selected user
+    usual_items_count = 3
+    search_query = None  # text of search entry, None if search is not active
+    user_search_ranks = None  # user id -> position in fuzzy search results, None if search is not active
+    food_search_ranks = None  # food id -> position in fuzzy search results, None if search is not active
+    search_limit = 50
+    user_rows = dict()  # rows of user_list by user id
+    food_rows = dict()  # rows of food_list by food id
+    live_updates = False  # True if database notifies about changes, so lists don't have to be fetched again
+    row_image_size = 50  # size of images in user_list and food_list
+    user_atlas = None  # thumbnail_atlas.ThumbnailAtlas with images of users
+    food_atlas = None  # thumbnail_atlas.ThumbnailAtlas with images of food
+    photo_capture = None  # capture.PhotoCapture, created on first use
+    config = None  # config.Config used by frontend
+    ledger = None  # ledger.Ledger recording money transfers
+    transfer_mode = "deposit"  # "deposit" (cash to user), "withdraw" (user to cash) or "send" (user to user)
+    transfer_target = None  # user receiving money in "send" mode
+    resulting_balance_label_list = list()
+    transfer_target_label_list = list()
+    transfer_target_list = None  # listbox with users matching search in transaction window
+    stats_view = None  # text view in statistics window
+    consumption_forecast = None  # forecast.ConsumptionForecast of sold items
+    stock_horizon_days = 3.0  # items running out sooner are reported in statistics
+    usage_save_delay = 5  # seconds between purchase and saving of ranking and forecast, later purchases are included
+    usage_save_pending = False  # True if saving of ranking and forecast is scheduled
+
+    def __init__(self):
+        self.user_index = SearchIndex()  # index of users displayed in user_list
+        self.food_index = SearchIndex()  # index of food displayed in food_list
+        self.generation_lock = threading.Lock()  # guards user_list_generation and food_list_generation
 
     def register_user_image(self, image):
         """
@@ -86,7 +135,10 @@ class WindowHandler:
         """
 
         self.user_list = user_list
+        self.load_usage_ranking()
+        gtk_element_editor.set_listbox_sort(self.user_list, self.user_sort)
         self.clear_user_list()
+        self.load_user_list_snapshot()
         self.update_user_list()
 
     def register_food_list(self, food_list):
@@ -97,10 +149,54 @@ class WindowHandler:
         """
 
         self.food_list = food_list
-        # todo: add food filter
+        self.load_usage_ranking()
+        gtk_element_editor.set_listbox_sort(self.food_list, self.food_sort)
         self.clear_food_list()
+        self.load_food_list_snapshot()
         self.update_food_list()
 
+    def load_usage_ranking(self, *_):
+        """
+        Loads ranking of users and food and consumption forecast saved on disk (if they weren't loaded yet).
+        """
+
+        if self.usage_ranking is None:
+            self.usage_ranking = ranking.load_ranking(self.snapshot_dir)
+        if self.consumption_forecast is None:
+            self.consumption_forecast = forecast.load_forecast(self.snapshot_dir)
+
+    def record_purchase(self, user, food, amount):
+        """
+        Records purchase to ranking and reorders user and food list accordingly.
+
+        :param user: user who bought food
+        :param food: bought food (or None)
+        :param amount: amount of food
+        """
+
+        self.load_usage_ranking()
+        self.usage_ranking.record(user.id, food.id if food is not None else None, amount)
+        if food is not None:
+            self.consumption_forecast.record(food.id, amount)
+        if not self.usage_save_pending:
+            self.usage_save_pending = True
+            self.save_usage_later()
+        gtk_element_editor.invalidate_listbox_sort(self.user_list)
+        gtk_element_editor.invalidate_listbox_sort(self.food_list)
+        self.update_usual_items()
+
+    @use_threading
+    def save_usage_later(self):
+        """
+        Saves ranking and consumption forecast to disk in new thread after `usage_save_delay`, so purchases made
+        meanwhile are saved together and main loop doesn't wait for disk.
+        """
+
+        sleep(self.usage_save_delay)
+        self.usage_save_pending = False
+        self.usage_ranking.save(self.snapshot_dir)
+        self.consumption_forecast.save(self.snapshot_dir)
+
     def register_edit_food_price(self, edit):
         """
         Function used to register `Gtk.Entry` containing new price of food.
@@ -130,6 +226,8 @@ class WindowHandler:
         """
         self.selected_user = args[2]
         self.update_selected_user_all()
+        gtk_element_editor.invalidate_listbox_sort(self.food_list)
+        self.update_usual_items()
 
     def event_food_selected(self, *args):
         """
@@ -140,71 +238,225 @@ class WindowHandler:
         self.selected_food = args[2]
         self.update_selected_food_all()
 
+    def event_key_press(self, _, event, *__):
+        """
+        This handler should be called on key press in main window. Codes from keyboard-wedge barcode scanner select
+        food with the same barcode.
+
+        :param event: Gdk.EventKey
+        :return: True if event was consumed by scanned code, False otherwise
+        """
+
+        code = self.barcode_reader.feed(gtk_element_editor.get_key_event_char(event),
+                                        gtk_element_editor.get_key_event_time(event))
+        if code is None:
+            return False
+        food = self.food_by_barcode.get(code)
+        if food is None:
+            return False
+        self.event_food_selected(None, None, food)
+        return True
+
+    @instrument
     def event_save_profile(self, *_):
         """
-        Modifies user according to `edit_nick_entry` and `edit_name_entry`.
+        Modifies user according to `edit_nick_entry` and `edit_name_entry`. Row of edited user is updated and previous
+        window is shown immediately, database is updated in new thread. Row of new user is added when database
+        assigns its id.
         """
 
         if self.creating_new_user:
             self.user_to_edit = User()
         self.user_to_edit.name = gtk_element_editor.get_text_from_entry(self.edit_name_entry)
         self.user_to_edit.nick = gtk_element_editor.get_text_from_entry(self.edit_nick_entry)
-        if self.creating_new_user:
-            self.database.add_user(self.user_to_edit)
-        else:
-            self.database.edit_user(self.user_to_edit)
-        self.clear_user_list()
-        self.update_user_list_non_threading()
+        user = copy.copy(self.user_to_edit)
+        if not self.creating_new_user:
+            self.apply_database_change("user", user)
+        self.save_in_background("user", user, self.creating_new_user)
         self.update_selected_user_all()
         self.event_jmp_back()
 
     def event_select_image(self, *_):
         """
-        Lunches external command found in first line of config and finds last edited image in directory specified in
-        second line. Then it sets this image as user image.
+        Lunches external command found in first line of config and watches directory specified in second line for new
+        images. Main loop keeps running meanwhile. When command exits, last new image is set as user image.
         """
 
-        config = open(os.path.join(os.path.dirname(__file__), '../config.txt'), "r").read().split("\n")
-        config_command = data_manipulation.expand_username(config[0])
-        config_imagepath = data_manipulation.expand_username(config[1])
+        if self.photo_capture is None:
+            from .capture import PhotoCapture
+            self.photo_capture = PhotoCapture()
+        if self.selected_user is None or self.photo_capture.running:
+            return
+        if self.config is None:
+            self.set_config(sortiment_config.load_config())
+        user = self.selected_user
         self.actual_window.hide()
-        os.system(config_command)
+        if not self.photo_capture.start(self.config.capture_command, self.config.capture_dir,
+                                        lambda path: self.event_photo_captured(user, path)):
+            self.actual_window.show()
+
+    def event_photo_captured(self, user, path):
+        """
+        This handler is called when capture command started by `event_select_image` exits.
+
+        :param user: user whose image was taken
+        :param path: path to new image, or None if no image was taken
+        """
+
         self.actual_window.show()
-        newest = max(os.listdir(config_imagepath), key=lambda x: os.path.getctime(os.path.join(config_imagepath, x)))
-        newest = os.path.join(config_imagepath, newest)
-        self.selected_user.photo = newest
-        self.update_user_image()
+        if path is None:
+            return
+        user.photo = path
+        self.load_user_image_in_background(user)
+
+    @use_threading
+    def load_user_image_in_background(self, user):
+        """
+        Creates thumbnails of user image for detail and row in new thread, so big photos don't block main loop.
+
+        :param user: user whose image changed
+        """
+
+        size = self.get_scaled_image_size()
+        pixbuf = gtk_element_editor.load_pixbuf_from_file(user.photo, size, size)
+        row_pixbuf = gtk_element_editor.load_pixbuf_from_file(user.photo, self.row_image_size, self.row_image_size)
+        gtk_element_editor.run_in_main_loop(self.set_user_image_pixbufs, user, pixbuf, row_pixbuf)
 
+    def set_user_image_pixbufs(self, user, pixbuf, row_pixbuf):
+        """
+        Sets thumbnails created by `load_user_image_in_background`.
+
+        :param user: user whose image changed
+        :param pixbuf: thumbnail for images of selected user (or None)
+        :param row_pixbuf: thumbnail for row in user_list (or None)
+        """
+
+        if self.selected_user is not None and self.selected_user.id == user.id:
+            for user_image in self.user_image_list:
+                gtk_element_editor.set_image_pixbuf(user_image, pixbuf)
+        row = self.user_rows.get(user.id)
+        if row is not None:
+            gtk_element_editor.set_image_pixbuf(row.image, row_pixbuf)
+
+    @instrument
     def event_transfer(self, *_):
         """
-        Should be called when user clicked button to buy items.
+        Should be called when user clicked button to buy items. Nothing is bought if selected amount isn't positive.
         """
 
-        if self.selected_user is not None and self.selected_food is not None:
-            self.database.buy_items(self.selected_user.id, self.selected_food.id, self.selected_amount)
-            self.clear_user_list()
-            self.update_user_list_non_threading()
+        if self.selected_user is not None and self.selected_food is not None and self.selected_amount > 0:
+            user, food, amount = self.selected_user, self.selected_food, self.selected_amount
+            self.call_database_async("buy_items", user.id, food.id, amount, callback=self.event_purchase_saved,
+                                     error_callback=self.event_purchase_failed)
+            self.change_user_balance(user, -int(data_manipulation.basket_total([food.price or 0], [amount])))
+            self.record_purchase(user, food, amount)
             self.update_user_balance_labels()
 
+    def event_purchase_saved(self, *_):
+        """
+        Called in main loop when database confirms purchase. Without live updates, balances are fetched again.
+        """
+
+        if not self.live_updates:
+            self.refresh_list("user")
+
+    def event_purchase_failed(self, exception):
+        """
+        Called in main loop when purchase fails. Balances are fetched again, so local change is reverted.
+
+        :param exception: exception raised by database
+        """
+
+        self.refresh_list("user")
+        error_handler.show_error(type(exception), exception, exception.__traceback__)
+
+    def call_database_async(self, method, *args, callback=None, error_callback=None):
+        """
+        Calls database method without blocking main loop. `call_async` of database is used if it has one (for example
+        `database_client.DatabaseClient`), otherwise method is called in new thread. Callbacks are called in main loop.
+
+        :param method: name of database method
+        :param args: arguments of method
+        :param callback: function called with result
+        :param error_callback: function called with exception
+        """
+
+        call_async = getattr(self.database, "call_async", None)
+        if call_async is not None:
+            call_async(method, *args, callback=callback, error_callback=error_callback)
+        else:
+            self.call_database_in_thread(method, args, callback, error_callback)
+
+    @use_threading
+    def call_database_in_thread(self, method, args, callback, error_callback):
+        try:
+            result = getattr(self.database, method)(*args)
+        except Exception as e:
+            if error_callback is not None:
+                gtk_element_editor.run_in_main_loop(error_callback, e)
+            return
+        if callback is not None:
+            gtk_element_editor.run_in_main_loop(callback, result)
+
+    @instrument
     def event_save_food(self, *_):
         """
-        Modifies item according to `edit_food_name_entry` and `edit_food_price_entry`.
+        Modifies item according to `edit_food_name_entry` and `edit_food_price_entry`. Row of edited item is updated
+        and previous window is shown immediately, database is updated in new thread. Row of new item is added when
+        database assigns its id.
         """
 
         if self.creating_new_food:
-            self.user_to_edit = Item()
+            self.food_to_edit = Item()
         self.food_to_edit.name = gtk_element_editor.get_text_from_entry(self.edit_food_name_entry)
         pricestring = gtk_element_editor.get_text_from_entry(self.edit_food_price_entry)
         self.food_to_edit.price = data_manipulation.price_string_to_int(pricestring)
-        if self.creating_new_food:
-            self.database.add_item(self.food_to_edit)
-        else:
-            self.database.edit_item(self.food_to_edit)
-        self.clear_food_list()
-        self.update_food_list_non_threading()
+        food = copy.copy(self.food_to_edit)
+        if not self.creating_new_food:
+            self.apply_database_change("item", food)
+        self.save_in_background("item", food, self.creating_new_food)
         self.update_selected_food_all()
         self.event_jmp_back()
 
+    @use_threading
+    @use_spinner
+    def save_in_background(self, kind, obj, new):
+        """
+        Adds or edits user or item in database and reconciles displayed list with result. If database fails, list is
+        fetched again, so local change is reverted, and error is shown.
+
+        :param kind: "user" or "item"
+        :param obj: saved user or item (not shared with displayed rows)
+        :param new: True if object should be added, False if edited
+        """
+
+        try:
+            if new:
+                obj.id = (self.database.add_user if kind == "user" else self.database.add_item)(obj)
+            else:
+                (self.database.edit_user if kind == "user" else self.database.edit_item)(obj)
+        except Exception:
+            self.refresh_list(kind)
+            gtk_element_editor.run_in_main_loop(error_handler.show_error, *sys.exc_info())
+            return
+        if self.live_updates and obj.id is not None:
+            # notification may have been already applied, then the row is only updated again
+            gtk_element_editor.run_in_main_loop(self.apply_database_change, kind, obj)
+        else:
+            self.refresh_list(kind)
+
+    def refresh_list(self, kind):
+        """
+        Fetches user or food list again in new thread. Displayed rows are kept until new data arrive.
+
+        :param kind: "user" or "item"
+        """
+
+        if kind == "user" and self.user_list is not None:
+            self.update_user_list()
+        elif kind == "item" and self.food_list is not None:
+            self.update_food_list()
+
     def clear_user_list(self, *_):
         """
         Clears user list. (Don't use if another thread may be accessing user list.)
@@ -212,6 +464,9 @@ class WindowHandler:
 
         for c in self.user_list:
             self.user_list.remove(c)
+        self.user_index.clear()
+        self.user_rows = dict()
+        self.user_search_ranks = self.compute_search_ranks(self.user_index)
 
         self.user_list.add(gtk_element_editor.create_event_button(self.event_jmp_new_user, "+"))
 
@@ -222,6 +477,11 @@ class WindowHandler:
 
         for c in self.food_list:
             self.food_list.remove(c)
+        self.food_index.clear()
+        self.food_by_id = dict()
+        self.food_by_barcode = dict()
+        self.food_rows = dict()
+        self.food_search_ranks = self.compute_search_ranks(self.food_index)
 
         self.food_list.add(gtk_element_editor.create_event_button(self.event_jmp_new_food, "+"))
 
@@ -233,17 +493,61 @@ class WindowHandler:
 
         self.update_user_list_non_threading()
 
+    @instrument
     @use_spinner
     def update_user_list_non_threading(self, *_):
         """
-        Updates user_list with new data from database.
+        Fetches users from database and replaces rows of user_list with them in main loop. If another fetch was
+        started meanwhile, result is discarded, because newer result will replace rows. Rows are displayed before
+        atlas with new photos is built.
         """
 
-        user_list = self.database.get_user()
-        for user in user_list:
-            row = gtk_element_editor.create_user_row(user, self.event_user_selected, self.register_dynamic_font)
-            self.user_list.add(row)
-        self.user_list.show_all()
+        with self.generation_lock:
+            self.user_list_generation += 1
+            generation = self.user_list_generation
+        if self.ledger is not None:
+            user_list, changes = self.ledger.read_consistent(self.database.get_user)
+            self.add_pending_transfers(user_list, changes)
+        else:
+            user_list = self.database.get_user()
+        atlas = thumbnail_atlas.open_atlas(thumbnail_atlas.get_atlas_path("user", self.row_image_size,
+                                                                          self.snapshot_dir))
+        if generation != self.user_list_generation:
+            return
+        gtk_element_editor.run_in_main_loop(self.replace_user_list, generation, user_list, atlas)
+        snapshot.save_snapshot("user", user_list, self.snapshot_dir)
+        self.rebuild_list_atlas("user", generation, user_list, atlas)
+
+    def add_pending_transfers(self, users, changes=None):
+        """
+        Adds transfers waiting in ledger to balances of users read from database, which don't include them yet.
+
+        :param users: list of users (their balances are changed)
+        :param changes: result of `ledger.Ledger.get_pending_balance_changes` (or None to get it now)
+        """
+
+        if self.ledger is None:
+            return
+        if changes is None:
+            changes = self.ledger.get_pending_balance_changes()
+        for user in users:
+            if user.id in changes and user.balance is not None:
+                user.balance += changes[user.id]
+
+    def replace_user_list(self, generation, user_list, atlas):
+        """
+        Replaces rows of user_list with fetched users. Must be called from main loop.
+
+        :param generation: number of fetch which returned users
+        :param user_list: list of users
+        :param atlas: thumbnail_atlas.ThumbnailAtlas with images of users (or None)
+        """
+
+        if generation != self.user_list_generation:
+            return
+        self.user_atlas = atlas
+        self.clear_user_list()
+        self.fill_user_list(user_list, decode_missing=False)
         if self.selected_user is not None:
             for user in user_list:
                 if user.id == self.selected_user.id:
@@ -258,36 +562,203 @@ class WindowHandler:
         """
         self.update_food_list_non_threading()
 
+    @instrument
     @use_spinner
     def update_food_list_non_threading(self, *_):
         """
-        Updates food_list with new data from database.
+        Fetches items from database and replaces rows of food_list with them in main loop. If another fetch was
+        started meanwhile, result is discarded, because newer result will replace rows. Rows are displayed before
+        atlas with new photos is built.
         """
 
+        with self.generation_lock:
+            self.food_list_generation += 1
+            generation = self.food_list_generation
         food_list = self.database.get_item(None)
-        for food in food_list:
-            row = gtk_element_editor.create_food_row(food, self.event_food_selected, self.register_dynamic_font)
+        atlas = thumbnail_atlas.open_atlas(thumbnail_atlas.get_atlas_path("item", self.row_image_size,
+                                                                          self.snapshot_dir))
+        if generation != self.food_list_generation:
+            return
+        gtk_element_editor.run_in_main_loop(self.replace_food_list, generation, food_list, atlas)
+        snapshot.save_snapshot("item", food_list, self.snapshot_dir)
+        self.rebuild_list_atlas("item", generation, food_list, atlas)
+
+    def replace_food_list(self, generation, food_list, atlas):
+        """
+        Replaces rows of food_list with fetched items. Must be called from main loop.
+
+        :param generation: number of fetch which returned items
+        :param food_list: list of items
+        :param atlas: thumbnail_atlas.ThumbnailAtlas with images of items (or None)
+        """
+
+        if generation != self.food_list_generation:
+            return
+        self.food_atlas = atlas
+        self.clear_food_list()
+        self.fill_food_list(food_list, decode_missing=False)
+
+    def rebuild_list_atlas(self, kind, generation, objects, atlas):
+        """
+        Builds atlas with current photos of objects if atlas doesn't contain them, and lets main loop swap images of
+        rows to it. Should be called from worker thread after rows were displayed.
+
+        :param kind: "user" or "item"
+        :param generation: number of fetch which returned objects
+        :param objects: list of users or items
+        :param atlas: atlas used by displayed rows (or None)
+        """
+
+        if atlas is not None and atlas.covers(objects):
+            return
+        path = thumbnail_atlas.get_atlas_path(kind, self.row_image_size, self.snapshot_dir)
+        if thumbnail_atlas.build_atlas(path, objects, self.row_image_size, atlas,
+                                       getattr(self.database, "get_thumbnail", None)):
+            atlas = thumbnail_atlas.open_atlas(path)
+        gtk_element_editor.run_in_main_loop(self.set_list_atlas, kind, generation, atlas)
+
+    def set_list_atlas(self, kind, generation, atlas):
+        """
+        Sets images of rows of user_list or food_list from new atlas. Photos missing in atlas (if it couldn't be
+        built) are decoded. Must be called from main loop.
+
+        :param kind: "user" or "item"
+        :param generation: number of fetch for which atlas was built
+        :param atlas: thumbnail_atlas.ThumbnailAtlas (or None)
+        """
+
+        if kind == "user":
+            if generation != self.user_list_generation:
+                return
+            self.user_atlas = atlas
+            rows = self.user_rows
+        else:
+            if generation != self.food_list_generation:
+                return
+            self.food_atlas = atlas
+            rows = self.food_rows
+        for row in rows.values():
+            gtk_element_editor.update_row_image(row, atlas, self.row_image_size)
+
+    def fill_user_list(self, users, decode_missing=True):
+        """
+        Adds rows for given users to user_list.
+
+        :param users: list of users
+        :param decode_missing: False if photos missing in atlas are decoded later by `set_list_atlas`
+        """
+
+        self.user_index.add(users)
+        for user in users:
+            row = gtk_element_editor.create_user_row(user, self.event_user_selected, self.register_dynamic_font,
+                                                     self.row_image_size, atlas=self.user_atlas,
+                                                     decode_missing=decode_missing)
+            self.user_rows[user.id] = row
+            self.user_list.add(row)
+        self.user_list.show_all()
+        if self.search_query is not None:
+            self.user_search_ranks = self.compute_search_ranks(self.user_index)
+            gtk_element_editor.invalidate_listbox_filter(self.user_list)
+            gtk_element_editor.invalidate_listbox_sort(self.user_list)
+
+    def fill_food_list(self, foods, decode_missing=True):
+        """
+        Adds rows for given food to food_list.
+
+        :param foods: list of items
+        :param decode_missing: False if photos missing in atlas are decoded later by `set_list_atlas`
+        """
+
+        self.food_index.add(foods)
+        for food in foods:
+            self.food_by_id[food.id] = food
+            barcode = getattr(food, "barcode", None)
+            if barcode is not None:
+                self.food_by_barcode[str(barcode)] = food
+            row = gtk_element_editor.create_food_row(food, self.event_food_selected, self.register_dynamic_font,
+                                                     self.row_image_size, atlas=self.food_atlas,
+                                                     decode_missing=decode_missing)
+            self.food_rows[food.id] = row
             self.food_list.add(row)
         self.food_list.show_all()
+        if self.search_query is not None:
+            self.food_search_ranks = self.compute_search_ranks(self.food_index)
+            gtk_element_editor.invalidate_listbox_filter(self.food_list)
+            gtk_element_editor.invalidate_listbox_sort(self.food_list)
+        gtk_element_editor.run_in_main_loop(self.update_usual_items)  # may be called from worker thread
+
+    def load_user_list_snapshot(self, *_):
+        """
+        Fills user_list with users saved on disk after last successful update, so something is displayed before
+        database responds. Rows are replaced by next update.
+        """
+
+        users = snapshot.load_snapshot("user", self.snapshot_dir)
+        if users is None:
+            return
+        self.user_atlas = thumbnail_atlas.open_atlas(
+            thumbnail_atlas.get_atlas_path("user", self.row_image_size, self.snapshot_dir))
+        self.fill_user_list(users)
+
+    def load_food_list_snapshot(self, *_):
+        """
+        Fills food_list with items saved on disk after last successful update, so something is displayed before
+        database responds. Rows are replaced by next update.
+        """
+
+        foods = snapshot.load_snapshot("item", self.snapshot_dir)
+        if foods is None:
+            return
+        self.food_atlas = thumbnail_atlas.open_atlas(
+            thumbnail_atlas.get_atlas_path("item", self.row_image_size, self.snapshot_dir))
+        self.fill_food_list(foods)
+
+    def update_usual_items(self, *_):
+        """
+        Fills usual_items_box with buttons for buying items most often bought by selected user.
+        """
+
+        if self.usual_items_box is None:
+            return
+        buttons = list(self.usual_items_box)
+        for c in buttons:
+            self.usual_items_box.remove(c)
+        self.unregister_dynamic_font(buttons)
+        if self.selected_user is None or self.usage_ranking is None:
+            return
+        for item_id in self.usage_ranking.top_items(self.selected_user.id, self.usual_items_count):
+            food = self.food_by_id.get(item_id)
+            if food is None:
+                continue
+            button = gtk_element_editor.create_event_button(
+                lambda _, f=food: self.event_quick_buy(f),
+                data_manipulation.get_item_printable_name(food, pricetag=True))
+            self.register_dynamic_font(button, 0.4)
+            self.usual_items_box.add(button)
+        self.usual_items_box.show_all()
+
+    def get_scaled_image_size(self, standard_window_width=640, standard_window_height=320):
+        """
+        :return: size of images of selected user or food scaled according to window size
+        """
+
+        if self.window_size is None:
+            return self.image_size
+        return self.image_size * data_manipulation.compute_scaling_factor(self.window_size[0], self.window_size[1],
+                                                                          standard_window_width,
+                                                                          standard_window_height)
 
     def update_user_image(self, *_, standard_window_width=640, standard_window_height=320):
         """
         Updates images of selected user.
         """
-        if self.window_size is None:
-            scaling_factor = 1
-        else:
-            scaling_factor = data_manipulation.compute_scaling_factor(self.window_size[0], self.window_size[1],
-                                                                      standard_window_width, standard_window_height)
+        size = self.get_scaled_image_size(standard_window_width, standard_window_height)
 
         for user_image in self.user_image_list:
             gtk_element_editor.image_set_missing(user_image)
             if self.selected_user is not None:
                 if self.selected_user.photo is not None:
-                    gtk_element_editor.load_image_from_file(user_image,
-                                                            self.selected_user.photo,
-                                                            self.image_size * scaling_factor,
-                                                            self.image_size * scaling_factor)
+                    gtk_element_editor.load_image_from_file(user_image, self.selected_user.photo, size, size)
 
     def update_user_name_label(self, *_):
         """
@@ -325,6 +796,42 @@ class WindowHandler:
         for numpad_label in self.numpad_value_label_list:
             gtk_element_editor.change_label_entry_text(numpad_label,
                                                        data_manipulation.format_money(self.current_numpad_value))
+        self.update_resulting_balance_labels()
+
+    def get_transfer_balance_change(self):
+        """
+        :return: change of balance of selected user after transfer of value on numpad
+        """
+
+        if self.transfer_mode == "deposit":
+            return self.current_numpad_value
+        return -self.current_numpad_value
+
+    def update_resulting_balance_labels(self, *_):
+        """
+        Updates labels containing balance of selected user after transfer of value on numpad.
+        """
+
+        if self.selected_user is None or self.selected_user.balance is None:
+            text = "???"
+        else:
+            text = str(data_manipulation.Money(self.selected_user.balance) + self.get_transfer_balance_change())
+        for label in self.resulting_balance_label_list:
+            gtk_element_editor.change_label_entry_text(label, text)
+
+    def update_transfer_target_labels(self, *_):
+        """
+        Updates labels describing where money goes in transaction window.
+        """
+
+        if self.transfer_mode == "deposit":
+            text = "Deposit"
+        elif self.transfer_mode == "withdraw":
+            text = "Withdraw"
+        else:
+            text = "Send to " + data_manipulation.get_universal_printable_name(self.transfer_target)
+        for label in self.transfer_target_label_list:
+            gtk_element_editor.change_label_entry_text(label, text)
 
     def update_amount_entry(self, *_):
         gtk_element_editor.change_label_entry_text(self.selected_amount_entry, str(self.selected_amount))
@@ -386,6 +893,43 @@ class WindowHandler:
         self.update_selected_user_all()
         self.update_numpad_value_label()
 
+    def set_config(self, config):
+        """
+        Sets configuration used by frontend and applies its tunables. They are applied again when config is reloaded.
+
+        :param config: config.Config
+        """
+
+        self.config = config
+        self.apply_config(config)
+        config.subscribe(self.event_config_changed)
+
+    def apply_config(self, config):
+        """
+        Copies tunables from config.
+
+        :param config: config.Config
+        """
+
+        self.image_size = config.image_size
+        self.row_image_size = config.row_image_size
+        self.search_limit = config.search_limit
+        self.usual_items_count = config.usual_items_count
+        self.stock_horizon_days = config.stock_horizon_days
+        self.snapshot_dir = config.snapshot_dir or None
+
+    def event_config_changed(self, config):
+        """
+        This handler is called when config file changes. New row image size is used by rows created later.
+
+        :param config: reloaded config.Config
+        """
+
+        self.apply_config(config)
+        self.update_user_image()
+        self.update_food_image()
+        self.update_usual_items()
+
     def set_database(self, database):
         """
         Sets which database should be used for retrieving data to display.
@@ -394,6 +938,66 @@ class WindowHandler:
         """
 
         self.database = database
+        if hasattr(database, "subscribe"):
+            database.subscribe(self.event_database_changed)
+            self.live_updates = True
+        self.ledger = Ledger(database, get_ledger_path(self.snapshot_dir))
+
+    def event_database_changed(self, kind, obj):
+        """
+        This handler is called by database (from any thread) when user or item changes.
+
+        :param kind: "user", "item", or "reset" if changes may have been missed
+        :param obj: changed user or item
+        """
+
+        if kind == "user":
+            # balance from database doesn't include transfers waiting in ledger
+            obj = copy.copy(obj)
+            self.add_pending_transfers([obj])
+        gtk_element_editor.run_in_main_loop(self.apply_database_change, kind, obj)
+
+    def apply_database_change(self, kind, obj):
+        """
+        Updates row of changed user or item (or adds new row) without fetching whole list.
+
+        :param kind: "user", "item", or "reset" if whole lists should be fetched again
+        :param obj: changed user or item
+        """
+
+        if kind == "reset":
+            self.refresh_list("user")
+            self.refresh_list("item")
+        elif kind == "user" and self.user_list is not None:
+            row = self.user_rows.get(obj.id)
+            if row is None:
+                self.fill_user_list([obj])
+                return
+            vars(row.user).update(vars(obj))
+            self.user_index.add([row.user])
+            gtk_element_editor.change_row_text(row, data_manipulation.get_universal_printable_name(row.user))
+            self.user_search_ranks = self.compute_search_ranks(self.user_index)
+            gtk_element_editor.invalidate_listbox_filter(self.user_list)
+            gtk_element_editor.invalidate_listbox_sort(self.user_list)
+            if self.selected_user is not None and self.selected_user.id == obj.id:
+                self.update_selected_user_all()
+        elif kind == "item" and self.food_list is not None:
+            row = self.food_rows.get(obj.id)
+            if row is None:
+                self.fill_food_list([obj])
+                return
+            vars(row.user).update(vars(obj))
+            self.food_index.add([row.user])
+            barcode = getattr(row.user, "barcode", None)
+            if barcode is not None:
+                self.food_by_barcode[str(barcode)] = row.user
+            gtk_element_editor.change_row_text(row, data_manipulation.get_item_printable_name(row.user,
+                                                                                              pricetag=True))
+            self.food_search_ranks = self.compute_search_ranks(self.food_index)
+            gtk_element_editor.invalidate_listbox_filter(self.food_list)
+            gtk_element_editor.invalidate_listbox_sort(self.food_list)
+            if self.selected_food is not None and self.selected_food.id == obj.id:
+                self.update_selected_food_all()
 
     def user_filter(self, row, *_):
         """
@@ -403,17 +1007,66 @@ class WindowHandler:
         :return: True if user should be displayed, False otherwise.
         """
 
-        if self.regex_obj is None:
+        try:
+            user = row.user
+        except AttributeError:
             return True
+        if self.user_search_ranks is not None and user.id not in self.user_search_ranks:
+            return False
+        return self.user_index.matches(user, self.regex_obj)
+
+    def food_filter(self, row, *_):
+        """
+        Function used to filter food in listbox.
+
+        :param row: row.user should contain valid item
+        :return: True if food should be displayed, False otherwise.
+        """
+
         try:
-            names = data_manipulation.get_all_names(row.user)
+            food = row.user
         except AttributeError:
             return True
-        for name in names:
-            name = data_manipulation.normalize_string(name)
-            if self.regex_obj.search(name) is not None:
-                return True
-        return False
+        if self.food_search_ranks is not None and food.id not in self.food_search_ranks:
+            return False
+        return self.food_index.matches(food, self.regex_obj)
+
+    def user_sort(self, row1, row2, *_):
+        """
+        Function used to sort users in listbox, most likely users first. Rows without user (buttons) are first.
+
+        :param row1: first row
+        :param row2: second row
+        :return: negative number if row1 should be before row2, positive if after, 0 if equal
+        """
+
+        user1 = getattr(row1, "user", None)
+        user2 = getattr(row2, "user", None)
+        if user1 is None or user2 is None:
+            return (user1 is not None) - (user2 is not None)
+        if self.user_search_ranks is not None:
+            return self.user_search_ranks.get(user1.id, 0) - self.user_search_ranks.get(user2.id, 0)
+        return ranking.compare(self.usage_ranking.user_score(user1.id), self.usage_ranking.user_score(user2.id))
+
+    def food_sort(self, row1, row2, *_):
+        """
+        Function used to sort food in listbox, food most likely bought by selected user first. Rows without food
+        (buttons) are first.
+
+        :param row1: first row
+        :param row2: second row
+        :return: negative number if row1 should be before row2, positive if after, 0 if equal
+        """
+
+        food1 = getattr(row1, "user", None)
+        food2 = getattr(row2, "user", None)
+        if food1 is None or food2 is None:
+            return (food1 is not None) - (food2 is not None)
+        if self.food_search_ranks is not None:
+            return self.food_search_ranks.get(food1.id, 0) - self.food_search_ranks.get(food2.id, 0)
+        user_id = self.selected_user.id if self.selected_user is not None else None
+        return ranking.compare(self.usage_ranking.item_score(food1.id, user_id),
+                               self.usage_ranking.item_score(food2.id, user_id))
 
     def event_buy_food(self, *_):
         """
@@ -421,8 +1074,22 @@ class WindowHandler:
         """
 
         self.database.buy_items(self.selected_user, self.selected_food, self.selected_amount)
+        self.record_purchase(self.selected_user, self.selected_food, self.selected_amount)
         # todo: error message
 
+    def event_quick_buy(self, food):
+        """
+        Buys one piece of food for selected user. Called by buttons in usual_items_box.
+
+        :param food: food to buy
+        """
+
+        self.selected_food = food
+        self.update_selected_food_all()
+        self.selected_amount = 1
+        self.update_amount_entry()
+        self.event_transfer()
+
     def event_amount_up(self, *_):
         self.selected_amount += 1
         self.update_amount_entry()
@@ -431,6 +1098,7 @@ class WindowHandler:
         self.selected_amount -= 1
         self.update_amount_entry()
 
+    @instrument
     def window_configure(self, *args):
         """
         Function which should be called on every change of window size.
@@ -509,6 +1177,16 @@ class WindowHandler:
         if self.window_size is not None:
             self.apply_dynamic_font(self.default_font_factor * scale, self.window_size[1], widget)
 
+    def unregister_dynamic_font(self, widgets):
+        """
+        Stops resizing font of removed widgets.
+
+        :param widgets: list of widgets registered by `register_dynamic_font`
+        """
+
+        removed = {id(widget) for widget in widgets}
+        self.dynamic_font_list[:] = [w for w in self.dynamic_font_list if id(w[0]) not in removed]
+
     @staticmethod
     def apply_dynamic_font(factor, aheight, widget):
         """
@@ -585,7 +1263,63 @@ class WindowHandler:
         self.update_numpad_value_label()
 
     def register_resulting_balance(self, label, *_):
-        pass  # todo
+        """
+        Function to be called for registering GtkLabel for displaying balance of selected user after transaction.
+        """
+
+        self.resulting_balance_label_list.append(label)
+        self.update_resulting_balance_labels()
+
+    def register_transfer_target(self, label, *_):
+        """
+        Function to be called for registering GtkLabel for displaying kind of transaction.
+        """
+
+        self.transfer_target_label_list.append(label)
+        self.update_transfer_target_labels()
+
+    def register_stats_view(self, text_view, *_):
+        """
+        Function to be called for registering Gtk.TextView displaying statistics.
+        """
+
+        self.stats_view = text_view
+        gtk_element_editor.change_text_view_text(text_view, "Loading...")
+        self.update_stats()
+
+    @use_threading
+    @use_spinner
+    def update_stats(self, *_):
+        """
+        Computes statistics from transaction history in new thread and displays them in stats_view.
+        """
+
+        from . import reporting  # NumPy is imported only when statistics are needed
+
+        self.load_usage_ranking()
+        self.consumption_forecast.load_stock(forecast.get_stock_path(self.snapshot_dir))
+        low_stock = self.consumption_forecast.low_stock(self.stock_horizon_days)
+        history = reporting.TransactionHistory(self.database.get_transactions())
+        report = reporting.create_report(history, self.database.get_user(), self.database.get_item(None),
+                                         format_money=data_manipulation.format_money, low_stock=low_stock)
+        gtk_element_editor.run_in_main_loop(gtk_element_editor.change_text_view_text, self.stats_view, report)
+
+    def register_transfer_target_list(self, listbox, *_):
+        """
+        Function to be called for registering Gtk.ListBox for choosing user receiving money.
+        """
+
+        self.transfer_target_list = listbox
+
+    def register_usual_items_box(self, box, *_):
+        """
+        Function to register box for buttons of items usually bought by selected user.
+
+        :param box: Gtk.Box
+        """
+
+        self.usual_items_box = box
+        self.update_usual_items()
 
     def register_filter_clear_button(self, button, *_):
         """
@@ -645,9 +1379,20 @@ class WindowHandler:
         """
 
         self.current_numpad_value = 0
+        self.transfer_mode = "deposit"
+        self.transfer_target = None
         self.window_history.append(self.actual_window)
         self.actual_window.hide()
-        self.actual_window = window_creator.create_window_transaction(self, self.database)
+        self.actual_window = window_creator.create_window_transaction(self)
+
+    def event_jmp_stats(self, *_):
+        """
+        Switches current window to statistics window.
+        """
+
+        self.window_history.append(self.actual_window)
+        self.actual_window.hide()
+        self.actual_window = window_creator.create_window_stats(self)
 
     def event_jmp_edit_food(self, *_, new=False):
         """
@@ -674,8 +1419,100 @@ class WindowHandler:
         self.current_numpad_value += num
         self.update_numpad_value_label()
 
+    def event_transfer_deposit(self, *_):
+        self.set_transfer_mode("deposit")
+
+    def event_transfer_withdraw(self, *_):
+        self.set_transfer_mode("withdraw")
+
+    def set_transfer_mode(self, mode, target=None):
+        """
+        :param mode: "deposit", "withdraw" or "send"
+        :param target: user receiving money in "send" mode
+        """
+
+        self.transfer_mode = mode
+        self.transfer_target = target
+        self.update_transfer_target_labels()
+        self.update_resulting_balance_labels()
+
+    @instrument
+    def event_transfer_target_search(self, entry, *_):
+        """
+        Fills transfer_target_list with users most similar to text in search entry.
+        Should be called when text of search entry changes.
+
+        :param entry: Gtk.SearchEntry
+        """
+
+        if self.transfer_target_list is None:
+            return
+        for c in self.transfer_target_list:
+            self.transfer_target_list.remove(c)
+        query = gtk_element_editor.get_text_from_entry(entry)
+        if data_manipulation.normalize_string(query) == "":
+            return
+        for key, _ in self.user_index.fuzzy_search(query, self.search_limit):
+            user = self.user_index.objects.get(key)
+            if user is None or self.selected_user is None or user.id == self.selected_user.id:
+                continue
+            self.transfer_target_list.add(gtk_element_editor.create_user_row(user, self.event_transfer_target_selected,
+                                                                             image_height=self.row_image_size,
+                                                                             atlas=self.user_atlas))
+        self.transfer_target_list.show_all()
+
+    def event_transfer_target_selected(self, *args):
+        """
+        This handler should be called when user receiving money is selected.
+
+        :param args: args[2] = selected user
+        """
+
+        self.set_transfer_mode("send", args[2])
+
+    @instrument
     def event_make_transaction(self, *_):
-        pass  # todo
+        """
+        Records transfer of value on numpad to ledger, which submits it to database later, and updates displayed
+        balances immediately.
+        """
+
+        amount = self.current_numpad_value
+        if self.selected_user is None or amount <= 0:
+            return
+        if self.transfer_mode == "deposit":
+            self.ledger.record(None, self.selected_user.id, amount)
+        elif self.transfer_mode == "withdraw":
+            self.ledger.record(self.selected_user.id, None, amount)
+        elif self.transfer_target is not None:
+            self.ledger.record(self.selected_user.id, self.transfer_target.id, amount)
+            self.change_user_balance(self.transfer_target, amount)
+        else:
+            return
+        self.change_user_balance(self.selected_user, self.get_transfer_balance_change())
+        self.current_numpad_value = 0
+        self.update_numpad_value_label()
+        self.update_user_balance_labels()
+        self.event_jmp_back()
+
+    def change_user_balance(self, user, change):
+        """
+        Changes balance of user and its row locally, before database confirms it.
+
+        :param user: changed user
+        :param change: change of balance in cents
+        """
+
+        users = {id(user): user}
+        row = self.user_rows.get(user.id)
+        if row is not None:
+            users[id(row.user)] = row.user
+        if self.selected_user is not None and self.selected_user.id == user.id:
+            users[id(self.selected_user)] = self.selected_user
+        for changed in users.values():
+            changed.balance = (changed.balance or 0) + change
+        if row is not None:
+            gtk_element_editor.change_row_text(row, data_manipulation.get_universal_printable_name(row.user))
 
     def event_numpad_1(self, *_):
         self.event_numpad(1)
@@ -715,6 +1552,7 @@ class WindowHandler:
         self.current_numpad_value //= 10
         self.update_numpad_value_label()
 
+    @instrument
     def event_filter(self, button, *_):
         """
         Updates regex to filter users and food.
@@ -726,6 +1564,7 @@ class WindowHandler:
         self.regex_str += "[" + gtk_element_editor.get_text_from_button(button).lower() + "]"
         self.regex_obj = re.compile(self.regex_str)
         gtk_element_editor.set_listbox_filter(self.user_list, self.user_filter)
+        gtk_element_editor.set_listbox_filter(self.food_list, self.food_filter)
         self.filter_clear_button.show()
 
     def event_filter_clear(self, *_):
@@ -737,8 +1576,40 @@ class WindowHandler:
         self.regex_str = ""
         self.regex_obj = None
         gtk_element_editor.set_listbox_filter(self.user_list, self.user_filter)
+        gtk_element_editor.set_listbox_filter(self.food_list, self.food_filter)
         self.filter_clear_button.hide()
 
+    @instrument
+    def event_search_changed(self, entry, *_):
+        """
+        Shows only users and food with names similar to text in search entry, most similar first.
+        Should be called when text of search entry changes.
+
+        :param entry: Gtk.SearchEntry
+        """
+
+        query = gtk_element_editor.get_text_from_entry(entry)
+        self.search_query = query if data_manipulation.normalize_string(query) != "" else None
+        self.user_search_ranks = self.compute_search_ranks(self.user_index)
+        self.food_search_ranks = self.compute_search_ranks(self.food_index)
+        gtk_element_editor.set_listbox_filter(self.user_list, self.user_filter)
+        gtk_element_editor.set_listbox_filter(self.food_list, self.food_filter)
+        gtk_element_editor.invalidate_listbox_sort(self.user_list)
+        gtk_element_editor.invalidate_listbox_sort(self.food_list)
+
+    def compute_search_ranks(self, index):
+        """
+        Computes positions of objects in results of active fuzzy search. Called again whenever list is refilled,
+        because ranks are kept by object id.
+
+        :param index: SearchIndex of users or food
+        :return: dictionary object id -> position, or None if search is not active
+        """
+
+        if self.search_query is None:
+            return None
+        return {key: i for i, (key, _) in enumerate(index.fuzzy_search(self.search_query, self.search_limit))}
+
     def event_jmp_edit_user(self, *_, new=False):
         """
         Switches current window to profile editing window.
@@ -0,0 +1,178 @@
+"""
+Imports users or items from CSV or JSON Lines (same columns as produced by ``sortimentEXPORT.py``)::
+
+    python3 sortimentIMPORT.py users members.csv --upstream backend:8765
+    python3 sortimentIMPORT.py items items.jsonl --format jsonl
+
+Rows are validated as they are read and all errors are reported with line numbers. If file is valid, all objects
+are added by one `import_objects` request in one transaction, so running frontends refresh their lists only once.
+Column ``id`` is ignored, new ids are assigned by database. Amounts of money are in cents.
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+import database_factory
+from database import User, Item
+
+
+class ImportFileError(Exception):
+    pass
+
+
+def iter_records(f, file_format):
+    """
+    :param f: opened file
+    :param file_format: "csv" (with header) or "jsonl"
+    :return: generator of (line number, dictionary)
+    """
+
+    if file_format == "csv":
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as e:
+                    raise ImportFileError("line " + str(line_number) + ": invalid JSON: " + str(e))
+
+
+def get_text(record, key):
+    value = record.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def get_cents(record, key, default=None):
+    text = get_text(record, key)
+    if text is None:
+        return default
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(key + " must be integer number of cents")
+
+
+def parse_user(record, seen):
+    """
+    :param record: dictionary with columns nick, name, photo and balance
+    :param seen: set of nicks already used
+    :return: new User
+    :raise ValueError: if record is invalid
+    """
+
+    user = User(nick=get_text(record, "nick"), name=get_text(record, "name"), photo=get_text(record, "photo"),
+                balance=get_cents(record, "balance", 0))
+    if user.nick is None and user.name is None:
+        raise ValueError("nick or name is required")
+    if user.nick is not None:
+        if user.nick in seen:
+            raise ValueError("nick " + user.nick + " is already used")
+        seen.add(user.nick)
+    return user
+
+
+def parse_item(record, seen):
+    """
+    :param record: dictionary with columns name, price, photo and barcode
+    :param seen: set of barcodes already used
+    :return: new Item
+    :raise ValueError: if record is invalid
+    """
+
+    item = Item(name=get_text(record, "name"), price=get_cents(record, "price"), photo=get_text(record, "photo"),
+                barcode=get_text(record, "barcode"))
+    if item.name is None:
+        raise ValueError("name is required")
+    if item.price is None or item.price < 0:
+        raise ValueError("price must be non-negative")
+    if item.barcode is not None:
+        if item.barcode in seen:
+            raise ValueError("barcode " + item.barcode + " is already used")
+        seen.add(item.barcode)
+    return item
+
+
+def read_objects(database, kind, f, file_format):
+    """
+    Reads and validates all records of file.
+
+    :param database: database object, used to check uniqueness against existing objects
+    :param kind: "users" or "items"
+    :param f: opened file
+    :param file_format: "csv" or "jsonl"
+    :return: (list of valid objects, list of error messages)
+    """
+
+    if kind == "users":
+        parse = parse_user
+        seen = {user.nick for user in database.get_user() if user.nick is not None}
+    else:
+        parse = parse_item
+        seen = {str(item.barcode) for item in database.get_item(None) if getattr(item, "barcode", None) is not None}
+    objects = list()
+    errors = list()
+    for line_number, record in iter_records(f, file_format):
+        try:
+            if not isinstance(record, dict):
+                raise ValueError("record must be object")
+            objects.append(parse(record, seen))
+        except ValueError as e:
+            errors.append("line " + str(line_number) + ": " + str(e))
+    return objects, errors
+
+
+def import_objects(database, kind, objects):
+    """
+    :param database: database object
+    :param kind: "users" or "items"
+    :param objects: list of new users or items
+    :return: list of assigned ids
+    """
+
+    if kind == "users":
+        return database.import_objects(objects, list())[0]
+    return database.import_objects(list(), objects)[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import of users or items.")
+    parser.add_argument("kind", choices=("users", "items"), help="imported data")
+    parser.add_argument("file", help="input file (- for standard input)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv", help="input format")
+    parser.add_argument("--skip-invalid", action="store_true", help="import valid rows even if some are invalid")
+    parser.add_argument("--socket", help="path of Unix socket of local cache daemon")
+    parser.add_argument("--upstream", help="host:port of database server")
+    parser.add_argument("--fake", type=int, help="use synthetic database with given number of users instead")
+    args = parser.parse_args(argv)
+
+    database = database_factory.create_database(socket=args.socket, address=args.upstream, fake=args.fake,
+                                                latency="none")
+    try:
+        if args.file == "-":
+            objects, errors = read_objects(database, args.kind, sys.stdin, args.format)
+        else:
+            with open(args.file, "r", newline="", encoding="utf-8") as f:
+                objects, errors = read_objects(database, args.kind, f, args.format)
+    except (OSError, ImportFileError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    for error in errors:
+        print(error, file=sys.stderr)
+    if errors and not args.skip_invalid:
+        print("Nothing imported, fix errors or use --skip-invalid.", file=sys.stderr)
+        return 1
+    ids = import_objects(database, args.kind, objects)
+    print("Imported", len(ids), args.kind)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import copy
+import pickle
+import unittest
+
+from sortimentGUI import data_manipulation
+from sortimentGUI.data_manipulation import Money
+
+
+class ParseMoneyTest(unittest.TestCase):
+    def test_valid_amounts(self):
+        for text, cents in [("12", 1200), ("1.5", 150), ("1,05", 105), ("1.", 100), (".5", 50), ("-2", -200),
+                            ("+0,99", 99), (" 3,10€ ", 310), ("0", 0)]:
+            with self.subTest(text=text):
+                self.assertEqual(cents, data_manipulation.parse_money(text))
+
+    def test_invalid_amounts(self):
+        for text in ["", ".", "-", "1.234", "1,2,3", "abc", "1e3", "€"]:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    data_manipulation.parse_money(text)
+
+    def test_price_string_to_int(self):
+        self.assertEqual(150, data_manipulation.price_string_to_int("1.5"))
+        self.assertEqual(1200, data_manipulation.price_string_to_int("12"))
+
+    def test_format_round_trip(self):
+        for cents in [0, 5, 99, 100, 105, -1, -250, 123456]:
+            with self.subTest(cents=cents):
+                text = data_manipulation.format_money(cents)
+                self.assertEqual(cents, data_manipulation.parse_money(text))
+
+    def test_format_money(self):
+        self.assertEqual("-1,05€", data_manipulation.format_money(-105))
+        self.assertEqual("0.07$", data_manipulation.format_money(7, ".", "$"))
+
+
+class MoneyTest(unittest.TestCase):
+    def test_arithmetic(self):
+        self.assertEqual(Money(350), Money(100) + Money(250))
+        self.assertEqual(Money(150), Money(100) + 50)
+        self.assertEqual(Money(150), 50 + Money(100))
+        self.assertEqual(Money(-150), Money(100) - 250)
+        self.assertEqual(Money(150), 250 - Money(100))
+        self.assertEqual(Money(300), Money(100) * 3)
+        self.assertEqual(Money(300), 3 * Money(100))
+        self.assertEqual(Money(-100), -Money(100))
+        self.assertEqual(100, int(Money(100)))
+
+    def test_comparison(self):
+        self.assertLess(Money(1), Money(2))
+        self.assertGreater(Money(3), 2)
+        self.assertEqual(Money(5), 5)
+        self.assertFalse(Money(0))
+        self.assertEqual(hash(Money(5)), hash(Money(5)))
+
+    def test_rejects_non_integer_values(self):
+        for value in [1.5, True, "1"]:
+            with self.subTest(value=value):
+                with self.assertRaises(TypeError):
+                    Money(value)
+                with self.assertRaises(TypeError):
+                    Money(100) * value
+                with self.assertRaises(TypeError):
+                    Money(100) + value
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            Money(1).cents = 2
+
+    def test_pickle_and_copy(self):
+        money = Money(123)
+        self.assertEqual(money, pickle.loads(pickle.dumps(money)))
+        self.assertEqual(money, copy.deepcopy(money))
+        self.assertEqual(money, copy.copy(money))
+
+    def test_format(self):
+        self.assertEqual("1,23€", str(Money(123)))
+        self.assertEqual("-0.05", Money(-5).format(".", ""))
+        self.assertEqual(Money(150), Money.parse("1,50€"))
+
+
+class TotalsTest(unittest.TestCase):
+    def test_basket_total(self):
+        self.assertEqual(Money(2 * 150 + 3 * Money(40).cents), data_manipulation.basket_total([150, Money(40)], [2, 3]))
+        self.assertEqual(Money(0), data_manipulation.basket_total([], []))
+
+    def test_transfer_totals(self):
+        transfers = [{"from": None, "to": 1, "amount": 500}, {"from": 1, "to": 2, "amount": 200},
+                     {"from": 2, "to": None, "amount": 50}]
+        self.assertEqual({1: 300, 2: 150}, data_manipulation.transfer_totals(transfers))
+
+
+if __name__ == '__main__':
+    unittest.main()
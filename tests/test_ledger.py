@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from sortimentGUI.ledger import Ledger
+
+
+class RecordingDatabase:
+    def __init__(self):
+        self.fail = False
+        self.batches = list()
+        self.event = threading.Event()
+
+    def transfer_money(self, transfers):
+        if self.fail:
+            raise ConnectionError("down")
+        self.batches.append(transfers)
+        self.event.set()
+
+
+def wait_for(condition, timeout=5):
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            raise AssertionError("condition not met")
+        time.sleep(0.01)
+
+
+class LedgerTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "ledger.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)  # submit threads of ledgers keep running
+
+    def test_transfers_are_submitted_in_batch_and_journal_is_compacted(self):
+        database = RecordingDatabase()
+        ledger = Ledger(database, self.path, batch_delay=0.1)
+        ledger.record(None, 1, 500)
+        ledger.record(1, 2, 200)
+        self.assertEqual({1: 300, 2: 200}, ledger.get_pending_balance_changes())
+        wait_for(lambda: ledger.pending_count() == 0)
+        self.assertEqual(1, len(database.batches))
+        self.assertEqual([(None, 1, 500), (1, 2, 200)], [t[1:] for t in database.batches[0]])
+        wait_for(lambda: os.path.getsize(self.path) == 0)
+        self.assertEqual({}, ledger.get_pending_balance_changes())
+
+    def test_pending_transfers_survive_restart(self):
+        database = RecordingDatabase()
+        database.fail = True
+        ledger = Ledger(database, self.path, batch_delay=0.05, retry_delay=60)
+        transfer = ledger.record(None, 1, 500)
+        restarted = Ledger(database, self.path, batch_delay=0.05, retry_delay=60)
+        self.assertEqual(1, restarted.pending_count())
+        database.fail = False
+        restarted.retry_delay = 0.05
+        ledger.retry_delay = 0.05
+        wait_for(lambda: restarted.pending_count() == 0)
+        self.assertIn(transfer["id"], [t[0] for batch in database.batches for t in batch])
+
+    def test_read_consistent_returns_pending_changes(self):
+        database = RecordingDatabase()
+        database.fail = True
+        ledger = Ledger(database, self.path, batch_delay=0.05, retry_delay=60)
+        ledger.record(None, 3, 70)
+        result, changes = ledger.read_consistent(lambda: "users")
+        self.assertEqual(("users", {3: 70}), (result, changes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from database import User
+from sortimentGUI.search_index import SearchIndex
+
+
+def create_users(count):
+    return [User(id=i, nick="user" + str(i), name="Stefan Kral" if i == 0 else "Name Number" + str(i), balance=0)
+            for i in range(count)]
+
+
+class SearchIndexTest(unittest.TestCase):
+    def test_readding_replaces_names(self):
+        index = SearchIndex()
+        users = create_users(50)
+        index.add(users)
+        sizes = (len(index.postings), len(index.name_owners), sum(map(len, index.postings.values())))
+        for _ in range(10):
+            index.add(users[10:])
+        self.assertEqual(sizes, (len(index.postings), len(index.name_owners),
+                                 sum(map(len, index.postings.values()))))
+        self.assertEqual(0, index.fuzzy_search("stefan kral", 10)[0][0])
+
+    def test_readded_object_is_found(self):
+        index = SearchIndex()
+        users = create_users(20)
+        index.add(users)
+        for _ in range(300):
+            index.add(users[:1])
+        self.assertEqual(0, index.fuzzy_search("stefan kral", 5)[0][0])
+
+    def test_renamed_object_loses_old_name(self):
+        index = SearchIndex()
+        index.add([User(id=1, nick="alice", name=None, balance=0)])
+        index.add([User(id=1, nick="bob", name=None, balance=0)])
+        self.assertEqual([], index.fuzzy_search("alice", 5, min_similarity=0.5))
+        self.assertEqual(1, index.fuzzy_search("bob", 5)[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
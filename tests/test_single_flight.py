@@ -0,0 +1,94 @@
+import threading
+import time
+import unittest
+
+from sortimentGUI.single_flight import SingleFlight, SingleFlightDatabase
+
+
+class SlowDatabase:
+    def __init__(self):
+        self.calls = 0
+        self.users = [["alice"], ["bob"]]
+
+    def get_user(self, _=None):
+        self.calls += 1
+        time.sleep(0.1)
+        return self.users
+
+    def get_transactions(self, since=None, limit=None, offset=0):
+        self.calls += 1
+        time.sleep(0.1)
+        return [since, limit, offset]
+
+    def edit_user(self, user):
+        self.users = [user]
+
+
+def run_concurrently(functions):
+    results = [None] * len(functions)
+
+    def run(i):
+        results[i] = functions[i]()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(functions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_concurrent_calls_share_result(self):
+        flight = SingleFlight()
+        calls = list()
+
+        def function():
+            calls.append(1)
+            time.sleep(0.1)
+            return 42
+
+        results = run_concurrently([lambda: flight.do("key", function)] * 4)
+        self.assertEqual([42] * 4, results)
+        self.assertEqual(1, len(calls))
+
+    def test_exception_is_raised_to_all_callers(self):
+        flight = SingleFlight()
+
+        def function():
+            time.sleep(0.1)
+            raise ValueError("failed")
+
+        def call():
+            try:
+                flight.do("key", function)
+            except ValueError as e:
+                return str(e)
+
+        self.assertEqual(["failed"] * 3, run_concurrently([call] * 3))
+
+
+class SingleFlightDatabaseTest(unittest.TestCase):
+    def test_reads_with_equivalent_arguments_are_merged(self):
+        upstream = SlowDatabase()
+        database = SingleFlightDatabase(upstream)
+        results = run_concurrently([lambda: database.get_transactions(5), lambda: database.get_transactions(since=5),
+                                    lambda: database.get_transactions(5, None, 0)])
+        self.assertEqual([[5, None, 0]] * 3, results)
+        self.assertEqual(1, upstream.calls)
+
+    def test_callers_get_own_copies(self):
+        upstream = SlowDatabase()
+        database = SingleFlightDatabase(upstream)
+        results = run_concurrently([database.get_user, lambda: database.get_user(None)])
+        self.assertEqual(1, upstream.calls)
+        results[0][0].append("changed")
+        self.assertEqual([["alice"], ["bob"]], results[1])
+
+    def test_invalid_arguments_raise_type_error(self):
+        with self.assertRaises(TypeError):
+            SingleFlightDatabase(SlowDatabase()).get_transactions(unknown=1)
+
+
+if __name__ == '__main__':
+    unittest.main()